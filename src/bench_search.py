@@ -0,0 +1,323 @@
+#! /usr/bin/env python3
+
+"""Compare search engines on large generated day 12 heightmaps
+
+The scan, nodes, heap, bfs, bidir and ida engines search the original graph of Position nodes,
+and grid and jump search the flat Map. The scan and nodes engines keep the original AstarNode wrappers.
+"""
+
+import argparse
+import io
+import math
+import random
+import sys
+import time
+import tracemalloc
+
+from dataclasses import dataclass, field
+from functools import cache
+from heapq import heappop, heappush
+from typing import Any, Callable
+
+from common import AstarSearch, DistanceOracle, IndexedHeap, Options, SearchStats
+from day12.puzzle12 import Day12, Map
+
+SCALES = [10, 100]
+
+
+@dataclass(frozen=True)
+class Position:
+    row: int
+    col: int
+
+    def __add__(self, other: 'Position') -> 'Position':
+        return Position(self.row + other.row, self.col + other.col)
+
+
+class PositionMap(AstarSearch):
+    """The original day 12 map, a generic AstarSearch over Position nodes and nested lists of heights"""
+
+    DIRECTIONS = [Position(-1, 0), Position(0, -1), Position(1, 0), Position(0, 1)]
+
+    def __init__(self, grid: Map):
+        self.rows, self.cols = grid.rows, grid.cols
+        self.grid = [list(grid.cells[r * grid.cols:(r + 1) * grid.cols]) for r in range(grid.rows)]
+        self.origin = Position(*grid.position(grid.origin))
+        self.target = Position(*grid.position(grid.target))
+
+    def __getitem__(self, pos: Position) -> int:
+        return self.grid[pos.row][pos.col]
+
+    def valid(self, pos: Position) -> bool:
+        return (0 <= pos.row < self.rows) and (0 <= pos.col < self.cols)
+
+    @cache
+    def neighbors(self, node: Position) -> list[Position]:
+        neighbors = []
+        for direction in self.DIRECTIONS:
+            neighbor = node + direction
+            if self.valid(neighbor) and self[neighbor] - self[node] <= 1:
+                neighbors.append(neighbor)
+        return neighbors
+
+    @cache
+    def reverse_neighbors(self, node: Position) -> list[Position]:
+        neighbors = []
+        for direction in self.DIRECTIONS:
+            neighbor = node + direction
+            if self.valid(neighbor) and self[node] - self[neighbor] <= 1:
+                neighbors.append(neighbor)
+        return neighbors
+
+    def distance(self, src: Position, dst: Position) -> float:
+        return abs(src.row - dst.row) + abs(src.col - dst.col)
+
+    def heuristic(self, node: Position) -> float:
+        return self.distance(node, self.target)
+
+    def reverse_heuristic(self, node: Position, origin: Position) -> float:
+        return self.distance(origin, node)
+
+
+@dataclass(order=True, unsafe_hash=True)
+class AstarNode:
+    """The original node wrapper, which hashes only on the node and sorts only on the priority"""
+
+    node: Any = field(compare=False, hash=True)
+    priority: float = field(compare=True, hash=False, default=0.0)
+    backtrack: 'AstarNode' = field(compare=False, default=None, repr=False)
+
+    def __eq__(self, other: 'AstarNode') -> bool:
+        return self.node == other.node
+
+
+def find(lookup: dict[Any, AstarNode], node: Any) -> AstarNode:
+    if node not in lookup:
+        lookup[node] = AstarNode(node, AstarSearch.UNSEEN)
+    return lookup[node]
+
+
+def backtrack(current: AstarNode) -> list[Any]:
+    path = [current.node]
+    while current.backtrack:
+        current = current.backtrack
+        path.append(current.node)
+
+    path.reverse()
+
+    return path
+
+
+def scan_traverse(search: AstarSearch, origin: Any, target: Any) -> list[Any]:
+    """The original traverse, which scans the frontier list for every relaxed node"""
+    lookup = {}
+    a_origin = find(lookup, origin)
+    a_target = find(lookup, target)
+
+    exploring = [a_origin]
+    g_score = {a_origin: 0}
+
+    while exploring:
+        current = heappop(exploring)
+        if current == a_target:
+            return backtrack(current)
+
+        for node in search.neighbors(current.node):
+            neighbor = find(lookup, node)
+            tentative = g_score[current] + search.distance(current.node, neighbor.node)
+            if tentative < g_score.get(neighbor, search.UNSEEN):
+                neighbor.backtrack = current
+                g_score[neighbor] = tentative
+                neighbor.priority = tentative + search.heuristic(neighbor.node)
+                if neighbor not in exploring:
+                    heappush(exploring, neighbor)
+
+    return None
+
+
+def node_traverse(search: AstarSearch, origin: Any, target: Any) -> list[Any]:
+    """The indexed heap traverse, with a fresh AstarNode and g-score dict for every search"""
+    lookup = {}
+    a_origin = find(lookup, origin)
+    a_target = find(lookup, target)
+
+    exploring = IndexedHeap()
+    exploring.push(a_origin, search.heuristic(origin))
+    g_score = {a_origin: 0}
+
+    while exploring:
+        current, _ = exploring.pop()
+        if current == a_target:
+            return backtrack(current)
+
+        for node in search.neighbors(current.node):
+            neighbor = find(lookup, node)
+            tentative = g_score[current] + search.distance(current.node, neighbor.node)
+            if tentative < g_score.get(neighbor, search.UNSEEN):
+                neighbor.backtrack = current
+                g_score[neighbor] = tentative
+                neighbor.priority = tentative + search.heuristic(neighbor.node)
+                exploring.push(neighbor, neighbor.priority)
+
+    return None
+
+
+@cache
+def position_map(grid: Map) -> PositionMap:
+    """The map as a graph of Position nodes, kept so that repeated searches can reuse its tables"""
+    return PositionMap(grid)
+
+
+def graph_traverse(grid: Map, engine: Callable, model: str = 'general') -> list[Any]:
+    """Search the map as Position nodes"""
+    graph = position_map(grid)
+    graph.COST_MODEL = model
+    return engine(graph, graph.origin, graph.target)
+
+
+ENGINES: dict[str, Callable[[Map], list]] = {
+    'scan': lambda grid: graph_traverse(grid, scan_traverse),
+    'nodes': lambda grid: graph_traverse(grid, node_traverse),
+    'heap': lambda grid: graph_traverse(grid, AstarSearch.traverse),
+    'bfs': lambda grid: graph_traverse(grid, AstarSearch.traverse, 'unit'),
+    'bidir': lambda grid: graph_traverse(grid, AstarSearch.traverse_bidirectional),
+    'ida': lambda grid: graph_traverse(grid, AstarSearch.traverse_iterative),
+    'grid': lambda grid: grid.traverse(grid.origin, grid.target),
+    'jump': lambda grid: grid.traverse_jumps(grid.origin, grid.target),
+}
+
+# Iterative deepening takes far too long on the maze to run unless it's asked for
+DEFAULT_ENGINES = [engine for engine in ENGINES if engine != 'ida']
+
+
+def heightmap(scale: int, seed: int) -> Map:
+    """Generate a day 12 heightmap about `scale` times the size of the real one"""
+    buffer = io.StringIO()
+    Day12().generate(buffer, scale, random.Random(seed))
+    return Map(buffer.getvalue().encode())
+
+
+def maze(scale: int, seed: int) -> Map:
+    """Build a heightmap whose only route snakes back and forth across it
+
+    Lanes at height c are separated by walls at height a, which can be entered but not climbed out of.
+    The first lane starts with a step up from the origin, and the last lane ramps up to the summit.
+    The straight-line heuristic is poor here, so the search has to expand most of the map,
+    much like the real puzzle's spiral.
+    """
+    rows, cols = round(41 * math.sqrt(scale)) | 1, max(30, round(77 * math.sqrt(scale)))
+
+    lines = []
+    for row in range(rows):
+        if row % 2 == 0:
+            line = ['c'] * cols
+        else:
+            line = ['a'] * cols
+            line[cols - 1 if row % 4 == 1 else 0] = 'c'
+        lines.append(line)
+
+    last = lines[-1]
+    ramp = [chr(c) for c in range(ord('d'), ord('z') + 1)]
+    if (rows // 2) % 2 == 0:
+        last[cols - 1 - len(ramp):cols - 1], last[-1] = ramp, 'E'
+    else:
+        last[1:1 + len(ramp)], last[0] = list(reversed(ramp)), 'E'
+    lines[0][:2] = ['S', 'b']
+
+    return Map('\n'.join(map(''.join, lines)).encode())
+
+
+KINDS = {'maze': maze, 'open': heightmap}
+
+
+def run(engine: str, grid: Map, memory: bool) -> tuple[list, float, int]:
+    """Run one engine on a map, returning its path, the milliseconds it took, and its peak traced memory"""
+    PositionMap.neighbors.cache_clear()
+    PositionMap.reverse_neighbors.cache_clear()
+
+    if memory:
+        tracemalloc.start()
+    started = time.perf_counter_ns()
+    path = ENGINES[engine](grid)
+    elapsed = (time.perf_counter_ns() - started) / 1_000_000
+    peak = 0
+    if memory:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    return path, elapsed, peak
+
+
+def queries(grid: Map, count: int, seed: int) -> bool:
+    """Time many searches from ground level to the summit, one at a time and through a DistanceOracle"""
+    rng = random.Random(seed)
+    starts = rng.choices(grid.ground_level_starts(), k=count)
+
+    started = time.perf_counter_ns()
+    searched = [len(path) - 1 if (path := grid.traverse(start, grid.target)) else None for start in starts]
+    elapsed = (time.perf_counter_ns() - started) / 1_000_000
+    print(f'{elapsed:12,.3f} ms: {count:,} queries, one search each')
+
+    oracle = DistanceOracle(grid)
+    started = time.perf_counter_ns()
+    answered = [oracle.distance(start, grid.target) for start in starts]
+    elapsed = (time.perf_counter_ns() - started) / 1_000_000
+    print(f'{elapsed:12,.3f} ms: {count:,} queries, oracle with {oracle.hits:,} hits, {oracle.misses:,} misses, '
+          f'{oracle.size / 1024:,.0f} KB of tables')
+
+    return searched == answered
+
+
+def main(argv: list[str] = None) -> int:
+    # The puzzles read their options from sys.argv too, and this script's --memory replaces theirs
+    parser = argparse.ArgumentParser(description=__doc__, parents=[Options.parser()], conflict_handler='resolve')
+    parser.add_argument('engines', metavar='ENGINE', nargs='*', default=DEFAULT_ENGINES,
+                        help=f'engines to compare, from {", ".join(ENGINES)} (default: all but ida)')
+    parser.add_argument('--scales', type=int, nargs='+', default=SCALES, help='multiples of the real heightmap size')
+    parser.add_argument('--kind', choices=list(KINDS), default='maze', help='the kind of heightmap (default: maze)')
+    parser.add_argument('--seed', type=int, default=2022, help='random seed for the open heightmaps')
+    parser.add_argument('--stats', action='store_true', help='count what the heap engine does on each heightmap')
+    parser.add_argument('--trace', metavar='PREFIX', help='also write its expansions to PREFIX-<scale>x.jsonl')
+    parser.add_argument('--memory', action='store_true',
+                        help='trace the peak memory of each engine, over a first and a repeated search')
+    parser.add_argument('--queries', type=int, default=0,
+                        help='also time this many grid searches from random ground cells, with and without an oracle')
+    args = parser.parse_args(argv)
+
+    for scale in args.scales:
+        grid = KINDS[args.kind](scale, args.seed)
+        print(f'===== {scale}x: {grid.rows} x {grid.cols} {args.kind} =====')
+
+        lengths = set()
+        for engine in args.engines:
+            for attempt in ['first', 'again'] if args.memory else ['first']:
+                path, elapsed, peak = run(engine, grid, args.memory)
+                lengths.add(None if path is None else len(path) - 1)
+                line = f'{elapsed:12,.3f} ms: {engine}, {len(path) - 1 if path else None} steps'
+                if args.memory:
+                    line += f', {peak / 1024:,.0f} KB peak ({attempt} search)'
+                print(line)
+
+        if args.stats or args.trace:
+            graph = position_map(grid)
+            graph.COST_MODEL = 'general'
+            stats = SearchStats(tracing=bool(args.trace))
+            graph.traverse(graph.origin, graph.target, stats)
+            print(f'              {stats}')
+            if args.trace:
+                with open(f'{args.trace}-{scale}x.jsonl', 'w') as out:
+                    stats.dump(out)
+
+        if args.queries and not queries(grid, args.queries, args.seed):
+            print('The oracle disagrees with the searches')
+            return 1
+
+        if len(lengths) > 1:
+            print(f'Engines disagree on the shortest path: {lengths}')
+            return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,17 +1,458 @@
+import argparse
+import cProfile
+import contextlib
+import gc
+import hashlib
+import inspect
+import json
+import mmap
 import os
+import pickle
+import platform
+import pstats
+import random
+import statistics
 import sys
+import threading
 import time
+import tracemalloc
+import weakref
+
+from array import array
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager
+from dataclasses import asdict, dataclass, field, is_dataclass
+from functools import cache, reduce
+from heapq import heappop, heappush
+from typing import Any, Callable, Iterable, Iterator, TextIO
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+try:
+    import numpy
+except ImportError:  # Puzzles with a NumPy path fall back to plain Python
+    numpy = None
+
+TOP = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def environ_flag(name: str) -> bool:
+    """True if an environment variable is set to anything but empty or 0"""
+    return os.environ.get(name, '') not in ('', '0')
+
+
+@dataclass
+class Options:
+    """Run-time options, from the command line or AOC_* environment variables"""
+
+    benchmark: bool = False
+    warmup: int = 1
+    repeat: int = 10
+    gc: bool = False
+    benchmark_dir: str = None
+    cache: bool = False
+    cache_dir: str = os.path.join(TOP, '.cache', 'parsed')
+    cache_size: int = 256
+    profile: bool = False
+    profile_top: int = 10
+    profile_interval: float = 1.0
+    profile_dir: str = None
+    memory: bool = False
+    memory_top: int = 5
+    part: int = None
+    only: str = None
+    workers: int = 1
+    pool: str = 'process'
+    top: int = 3
+
+    @classmethod
+    def parse(cls, argv: list[str] = None) -> 'Options':
+        """Parse options, ignoring any arguments meant for someone else"""
+
+        args, _ = cls.parser().parse_known_args(sys.argv[1:] if argv is None else argv)
+        return cls(**vars(args))
+
+    @classmethod
+    def parser(cls) -> argparse.ArgumentParser:
+        """A parser for just these options, which other scripts can use as a parent parser"""
+
+        parser = argparse.ArgumentParser(add_help=False)
+        parser.add_argument('--benchmark', action='store_true', default=environ_flag('AOC_BENCHMARK'),
+                            help='time parse, part1 and part2 over many repetitions')
+        parser.add_argument('--warmup', type=int, default=os.environ.get('AOC_WARMUP', cls.warmup),
+                            help='untimed runs of each phase before sampling')
+        parser.add_argument('--repeat', type=int, default=os.environ.get('AOC_REPEAT', cls.repeat),
+                            help='timed runs of each phase')
+        parser.add_argument('--gc', action='store_true', default=environ_flag('AOC_GC'),
+                            help='leave the garbage collector enabled while timing')
+        parser.add_argument('--benchmark-dir', default=os.environ.get('AOC_BENCHMARK_DIR'),
+                            help='where to write benchmark JSON (default: the puzzle directory)')
+        parser.add_argument('--cache', action='store_true', default=environ_flag('AOC_CACHE'),
+                            help='reuse parsed data saved by earlier runs')
+        parser.add_argument('--cache-dir', default=os.environ.get('AOC_CACHE_DIR', cls.cache_dir),
+                            help='where to save parsed data')
+        parser.add_argument('--cache-size', type=int, default=os.environ.get('AOC_CACHE_SIZE', cls.cache_size),
+                            help='size limit of the parsed data cache, in MB')
+        parser.add_argument('--profile', action='store_true', default=environ_flag('AOC_PROFILE'),
+                            help='profile parse, part1 and part2 separately')
+        parser.add_argument('--profile-top', type=int, default=os.environ.get('AOC_PROFILE_TOP', cls.profile_top),
+                            help='how many functions and lines to list for each phase')
+        parser.add_argument('--profile-interval', type=float,
+                            default=os.environ.get('AOC_PROFILE_INTERVAL', cls.profile_interval),
+                            help='milliseconds between stack samples')
+        parser.add_argument('--profile-dir', default=os.environ.get('AOC_PROFILE_DIR'),
+                            help='where to write profiles (default: the puzzle directory)')
+        parser.add_argument('--part', type=int, choices=(1, 2), default=os.environ.get('AOC_PART'),
+                            help='run only part 1 or part 2')
+        parser.add_argument('--only', choices=('test', 'real'), default=os.environ.get('AOC_ONLY'),
+                            help='run only the test data or the real data')
+        parser.add_argument('--workers', type=int, default=os.environ.get('AOC_WORKERS', cls.workers),
+                            help='run the test and real data for both parts on this many workers at once')
+        parser.add_argument('--pool', choices=('process', 'thread'), default=os.environ.get('AOC_POOL', cls.pool),
+                            help='the kind of workers to use')
+        parser.add_argument('--memory', action='store_true', default=environ_flag('AOC_MEMORY'),
+                            help='trace memory used by parse, part1 and part2')
+        parser.add_argument('--memory-top', type=int, default=os.environ.get('AOC_MEMORY_TOP', cls.memory_top),
+                            help='how many allocation sites to list for each phase')
+        parser.add_argument('--top', type=int, default=os.environ.get('AOC_TOP', cls.top),
+                            help='how many of the leading Elves to total in day 1 part 2')
+
+        return parser
+
+
+@dataclass
+class Summary:
+    """Summary statistics for a list of samples, in milliseconds"""
+
+    min: float
+    median: float
+    p95: float
+    mean: float
+    stddev: float
+
+    @classmethod
+    def of(cls, samples: list[float]) -> 'Summary':
+        ordered = sorted(samples)
+        p95 = ordered[min(len(ordered) - 1, round(0.95 * (len(ordered) - 1)))]
+        stddev = statistics.stdev(ordered) if len(ordered) > 1 else 0.0
+        return cls(ordered[0], statistics.median(ordered), p95, statistics.mean(ordered), stddev)
+
+
+class ParseCache:
+    """A size-limited disk cache of parsed data, keyed by content
+
+    Entries are pickled. Reading an entry refreshes its modification time,
+    so evicting the oldest files first discards the least recently used.
+    """
+
+    def __init__(self, directory: str, limit_mb: int):
+        self.directory = directory
+        self.limit = limit_mb * 1024 * 1024
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key(*parts: bytes) -> str:
+        """Hash the things that determine the parsed data"""
+        digest = hashlib.sha256()
+        for part in parts:
+            digest.update(len(part).to_bytes(8, 'little'))
+            digest.update(part)
+        return digest.hexdigest()
+
+    @staticmethod
+    def digest(filename: str, block_size: int = 1024 * 1024) -> bytes:
+        """Hash a file one block at a time, so that large data files aren't read into memory"""
+        digest = hashlib.sha256()
+        with open(filename, 'rb') as df:
+            while block := df.read(block_size):
+                digest.update(block)
+        return digest.digest()
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, f'{key}.pickle')
+
+    def load(self, key: str) -> tuple[bool, Any]:
+        """Return (True, data) for a hit, (False, None) for a miss"""
+        path = self.path(key)
+        try:
+            with open(path, 'rb') as cf:
+                data = pickle.load(cf)
+        except FileNotFoundError:
+            return False, None
+        except Exception:
+            # A damaged or stale entry is just a miss
+            self.discard(path)
+            return False, None
+
+        os.utime(path)
+        return True, data
+
+    def store(self, key: str, data: Any) -> bool:
+        """Save data, unless it can't be pickled; returns True if saved"""
+        try:
+            blob = pickle.dumps(data, pickle.HIGHEST_PROTOCOL)
+        except (pickle.PicklingError, TypeError, AttributeError, RecursionError):
+            return False
+
+        path = self.path(key)
+        temporary = f'{path}.{os.getpid()}.tmp'
+        with open(temporary, 'wb') as cf:
+            cf.write(blob)
+        os.replace(temporary, path)
+
+        self.evict()
+        return True
+
+    def evict(self) -> None:
+        """Delete the least recently used entries until the cache fits its limit"""
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.pickle'):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.limit:
+                break
+            self.discard(path)
+            total -= size
+
+    @staticmethod
+    def discard(path: str) -> None:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+class StackSampler:
+    """Periodically sample the call stack of one thread from a background thread
+
+    Whole stacks are counted by function, for flame graphs,
+    and the innermost frame is counted by line, to find hot spots.
+    """
 
-from dataclasses import dataclass, field
-from functools import cache
-from typing import Any
+    def __init__(self, interval_ms: float):
+        self.interval = interval_ms / 1000
+        self.stacks: Counter[str] = Counter()
+        self.lines: Counter[str] = Counter()
+        self._thread = None
+        self._stopping = threading.Event()
+
+    def start(self) -> None:
+        self._target = threading.get_ident()
+        self._stopping.clear()
+        self._switching = sys.getswitchinterval()
+        sys.setswitchinterval(min(self._switching, self.interval))
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopping.set()
+        self._thread.join()
+        sys.setswitchinterval(self._switching)
+
+    def _sample(self) -> None:
+        while not self._stopping.wait(self.interval):
+            frame = sys._current_frames().get(self._target)
+            if frame is None:
+                continue
+
+            code = frame.f_code
+            self.lines[f'{code.co_filename}:{frame.f_lineno} ({code.co_name})'] += 1
+
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})')
+                frame = frame.f_back
+            self.stacks[';'.join(reversed(stack))] += 1
+
+    def write_collapsed(self, filename: str) -> None:
+        """Write stacks in the collapsed format that flame graph tools read"""
+        with open(filename, 'w') as cf:
+            for stack, count in sorted(self.stacks.items()):
+                cf.write(f'{stack} {count}\n')
+
+
+def max_rss() -> int:
+    """The peak resident set size of this process in bytes, or 0 if unknown"""
+    if resource is None:
+        return 0
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == 'darwin' else rss * 1024
+
+
+@dataclass
+class MemoryUsage:
+    """Memory used by one call, in bytes"""
+
+    peak: int
+    retained: int
+    rss: int
+    rss_growth: int
+
+    def __str__(self) -> str:
+        return (f'{self.peak / 1024:10,.1f} KB: peak, {self.retained / 1024:,.1f} KB retained, '
+                f'max RSS {self.rss / 1024:,.0f} KB (+{self.rss_growth / 1024:,.0f})')
+
+
+class MemoryTracker:
+    """Measure the memory used by each phase of a puzzle, with tracemalloc and RSS"""
+
+    FILTERS = [
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+        tracemalloc.Filter(False, '<unknown>'),
+    ]
+
+    def __init__(self, top: int):
+        self.top = top
+        self.filters = self.FILTERS + self.instrumentation()
+        self.last: MemoryUsage = None
+        self.usage: dict[str, list[MemoryUsage]] = {}
+        self.sites: dict[str, Counter[str]] = {}
+
+    @staticmethod
+    def instrumentation() -> list[tracemalloc.Filter]:
+        """Filters for the code that wraps each phase, so that the allocation sites listed belong to the puzzle"""
+        filters = [tracemalloc.Filter(False, contextlib.__file__)]
+        for function in (max_rss, MemoryTracker.phase, Profiler.phase, Puzzle.measure, Puzzle.start, Puzzle.stop):
+            function = inspect.unwrap(function)
+            lines, first = inspect.getsourcelines(function)
+            filename = inspect.getsourcefile(function)
+            filters.extend(tracemalloc.Filter(False, filename, line) for line in range(first, first + len(lines)))
+        return filters
+
+    @contextmanager
+    def phase(self, name: str):
+        """Measure everything that runs inside this context as part of a phase"""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+        gc.collect()
+        before = tracemalloc.take_snapshot().filter_traces(self.filters)
+        rss = max_rss()
+        tracemalloc.reset_peak()
+        current, _ = tracemalloc.get_traced_memory()
+        try:
+            yield
+        finally:
+            now, peak = tracemalloc.get_traced_memory()
+            after = tracemalloc.take_snapshot().filter_traces(self.filters)
+
+            self.last = MemoryUsage(peak - current, now - current, max_rss(), max_rss() - rss)
+            self.usage.setdefault(name, []).append(self.last)
+
+            sites = self.sites.setdefault(name, Counter())
+            for stat in after.compare_to(before, 'lineno'):
+                if stat.size_diff > 0:
+                    frame = stat.traceback[0]
+                    sites[f'{frame.filename}:{frame.lineno}'] += stat.size_diff
+
+    def report(self) -> None:
+        """Print the peak and retained memory, and top allocation sites, of each phase"""
+        for name, usage in self.usage.items():
+            peak = max(u.peak for u in usage)
+            retained = sum(u.retained for u in usage)
+            print(f'----- Memory of {name}: {peak / 1024:,.1f} KB peak, {retained / 1024:,.1f} KB retained '
+                  f'over {len(usage)} calls')
+            for site, size in self.sites[name].most_common(self.top):
+                print(f'{size / 1024:10,.1f} KB: {site}')
+        print()
+
+
+class Profiler:
+    """Profile each phase of a puzzle separately, with cProfile and a stack sampler"""
+
+    def __init__(self, directory: str, prefix: str, top: int, interval_ms: float):
+        self.directory = directory
+        self.prefix = prefix
+        self.top = top
+        self.interval = interval_ms
+        self.profiles: dict[str, cProfile.Profile] = {}
+        self.samplers: dict[str, StackSampler] = {}
+
+    @contextmanager
+    def phase(self, name: str):
+        """Profile everything that runs inside this context as part of a phase"""
+        profile = self.profiles.setdefault(name, cProfile.Profile())
+        sampler = self.samplers.setdefault(name, StackSampler(self.interval))
+
+        sampler.start()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            sampler.stop()
+
+    def report(self) -> None:
+        """Save the profiles and print the hot spots of each phase"""
+        os.makedirs(self.directory, exist_ok=True)
+        for name, profile in self.profiles.items():
+            base = os.path.join(self.directory, f'{self.prefix}-{name}')
+            profile.dump_stats(f'{base}.pstats')
+            sampler = self.samplers[name]
+            sampler.write_collapsed(f'{base}.collapsed')
+
+            print(f'----- Profile of {name}: {base}.pstats, {base}.collapsed')
+            stats = pstats.Stats(profile, stream=sys.stdout)
+            stats.strip_dirs().sort_stats(pstats.SortKey.CUMULATIVE).print_stats(self.top)
+
+            samples = sum(sampler.lines.values())
+            if samples:
+                print(f'Hottest lines of {samples} samples:')
+                for line, count in sampler.lines.most_common(self.top):
+                    print(f'{100 * count / samples:6.1f}% {line}')
+                print()
+
+
+def timed(method: Callable, *args) -> tuple[Any, float]:
+    """Call a method, returning its result and the elapsed time in milliseconds"""
+    started = time.perf_counter_ns()
+    result = method(*args)
+    return result, (time.perf_counter_ns() - started) / 1_000_000
+
+
+@dataclass
+class Evaluation:
+    """One run of part1 or part2, on test or real data"""
+
+    name: str
+    kind: str
+    filename: str
+    index: int = None
+    extra: tuple = ()
+    expected: Any = None
+    number: int = None
+
+    def describe(self, result: Any) -> str:
+        if self.kind == 'real':
+            return f'{self.name} real = {result}'
+        if self.number is None:
+            return f'{self.name} test = {result}'
+        passed = 'passed' if result == self.expected else 'failed'
+        return f'{self.name} test {self.number}, {self.expected} == {result} => {passed}'
 
 
 class Puzzle:
-    """This is a framework for solving each day's puzzle"""
+    """This is a framework for solving each day's puzzle
+
+    Parsed data is treated as immutable: part1 and part2 may run at the same time, on
+    the same parsed data, so any state they change belongs in a working copy of their own.
+    """
+
+    # Large data files are read in chunks of about this many bytes
+    CHUNK_SIZE = 64 * 1024 * 1024
 
     def __init__(self, datafile: str = 'real.data', *testfiles: str):
-        self.base = os.path.dirname(sys.argv[0])
+        self.base = os.path.dirname(inspect.getfile(type(self)))
 
         self.datafile = datafile
         self.testfiles = testfiles
@@ -19,12 +460,29 @@ class Puzzle:
         if len(testfiles) == 0:
             self.testfiles = ['test.data']
 
-        self.data = None
-        self.tests = None
+        self._parsed: dict[str, Any] = {}
+
+        self.options = Options.parse()
+        self.cache = ParseCache(self.options.cache_dir, self.options.cache_size) if self.options.cache else None
+        self.profiler = None
+        if self.options.profile:
+            directory = self.options.profile_dir or self.base
+            prefix = type(self).__name__.lower()
+            self.profiler = Profiler(directory, prefix, self.options.profile_top, self.options.profile_interval)
+        self.memory = MemoryTracker(self.options.memory_top) if self.options.memory else None
+
+        # Whether each phase is timed or instrumented on its own, so that phases mustn't share work
+        self.measuring = self.options.benchmark or self.options.profile or self.options.memory
 
         self._started = 0
         self._elapsed = 0
 
+    def __getstate__(self) -> dict:
+        """Leave run-time state behind when a puzzle is sent to another process"""
+        state = self.__dict__.copy()
+        state.update(_parsed={}, cache=None, profiler=None, memory=None)
+        return state
+
     # ----- Methods each Puzzle needs to implement ----------------------------
 
     def parse_data(self, filename):
@@ -39,8 +497,37 @@ class Puzzle:
         """Implement part 2 of the puzzle"""
         raise NotImplementedError('part2')
 
+    # ----- Methods for generating large data files ---------------------------
+
+    def generate(self, out: TextIO, scale: int, rng: random.Random) -> None:
+        """Write a valid data file, roughly `scale` times the size of the real data"""
+        raise NotImplementedError('generate')
+
+    def generated(self, data) -> Any:
+        """Convert the parsed data of a generated file into the argument for part1 and part2"""
+        return data
+
     # ----- Useful methods for parsing data files -----------------------------
 
+    def parse(self, filename: str) -> Any:
+        """Parse a data file, using the parsed data cache if it's enabled"""
+
+        if self.cache is None:
+            return self.parse_data(filename)
+
+        contents = self.cache.digest(os.path.join(self.base, filename))
+        with open(inspect.getfile(type(self)), 'rb') as sf:
+            source = sf.read()
+        with open(__file__, 'rb') as cf:
+            common = cf.read()
+        key = self.cache.key(contents, source, common, type(self).__module__.encode(), type(self).__name__.encode())
+
+        hit, data = self.cache.load(key)
+        if not hit:
+            data = self.parse_data(filename)
+            self.cache.store(key, data)
+        return data
+
     def read_blob(self, filename: str) -> str:
         """Read a data file, returning its entire contents as a string"""
 
@@ -56,92 +543,273 @@ class Puzzle:
     def read_stripped(self, filename: str) -> list[str]:
         """Read a data file, stripping leading and trailing white space"""
 
-        return list(map(str.strip, self.read_lines(filename)))
-
-    # ----- Test runner -------------------------------------------------------
+        with open(os.path.join(self.base, filename), 'r') as df:
+            return [line.strip() for line in df]
 
-    def run(self, test1: int | dict | list = None, test2: int | dict | list = None) -> None:
-        """Load data and run tests"""
+    def iter_stripped(self, filename: str) -> Iterator[str]:
+        """Lazily read a data file one stripped line at a time"""
 
-        print('Parsing test data ...')
-        self.tests = [self.parse_data(tf) for tf in self.testfiles]
+        with open(os.path.join(self.base, filename), 'r') as df:
+            for line in df:
+                yield line.strip()
+
+    def iter_range(self, filename: str, start: int, end: int) -> Iterator[str]:
+        """Lazily read the stripped lines in one byte range of a data file"""
+
+        with open(os.path.join(self.base, filename), 'rb') as df:
+            df.seek(start)
+            position = start
+            while position < end:
+                line = df.readline()
+                if not line:
+                    break
+                position += len(line)
+                yield line.decode().strip()
+
+    def chunk_ranges(self, filename: str, size: int, separator: bytes = b'\n') -> list[tuple[int, int]]:
+        """Split a data file into byte ranges of at least `size` bytes, each ending just after a separator"""
+
+        ranges = []
+        data = self.read_mapped(filename)
+        start = 0
+        while start < len(data):
+            found = data.find(separator, start + size) if start + size < len(data) else -1
+            end = len(data) if found < 0 else found + len(separator)
+            ranges.append((start, end))
+            start = end
+        return ranges
+
+    def iter_chunks(self, filename: str, separator: bytes = b'\n') -> Iterator[bytes]:
+        """Lazily read a data file in chunks of about CHUNK_SIZE bytes, each ending just after a separator
+
+        Only one chunk at a time is copied out of the memory-mapped file, so memory stays bounded.
+        """
+
+        data = self.read_mapped(filename)
+        for start, end in self.chunk_ranges(filename, self.CHUNK_SIZE, separator):
+            yield data[start:end]
+
+    def read_mapped(self, filename: str) -> mmap.mmap | bytes:
+        """Memory-map a data file, returning a read-only bytes-like buffer
+
+        The buffer supports len, indexing, slicing and find without copying
+        the file; wrap it in a memoryview for zero-copy slices.
+        """
+
+        with open(os.path.join(self.base, filename), 'rb') as df:
+            if os.fstat(df.fileno()).st_size == 0:
+                return b''
+            return mmap.mmap(df.fileno(), 0, access=mmap.ACCESS_READ)
 
-        print('Parsing real data ...')
-        self.data = self.parse_data(self.datafile)
+    # ----- Test runner -------------------------------------------------------
 
-        if test1 is not None:
-            if isinstance(test1, dict):
-                self.map_test('part1', **test1)
-            elif isinstance(test1, list):
-                if len(self.tests) == len(test1):
-                    self.multi_test('part1', test1, self.tests, True)
-                else:
-                    self.multi_test('part1', test1, self.tests[0], False)
-            else:
-                self.single_test('part1', test1)
-
-        if test2 is not None:
-            if isinstance(test2, dict):
-                self.map_test('part1', test2)
-            elif isinstance(test2, list):
-                if len(self.tests) == len(test2):
-                    self.multi_test('part2', test2, self.tests, True)
+    def run(self, test1: int | dict | list = None, test2: int | dict | list = None) -> None:
+        """Run tests and real data for each part, parsing data files as they're needed"""
+
+        expectations = {
+            f'part{part}': expectation for part, expectation in ((1, test1), (2, test2))
+            if expectation is not None and self.options.part in (None, part)
+        }
+
+        plan = []
+        for name, expectation in expectations.items():
+            plan.extend(self.plan(name, expectation))
+        plan = [evaluation for evaluation in plan if self.wants(evaluation.kind)]
+
+        # Instrumentation only sees this process, so it forces a sequential run
+        if self.options.workers > 1 and not (self.profiler or self.memory):
+            self.evaluate_concurrently(plan)
+        else:
+            for evaluation in plan:
+                self.conclude(evaluation, self.evaluate(evaluation))
+
+        if self.profiler:
+            self.profiler.report()
+
+        if self.memory:
+            self.memory.report()
+
+        if self.options.benchmark:
+            self.benchmark(expectations)
+
+    def plan(self, name: str, expectation: int | dict | list) -> list[Evaluation]:
+        """List the test and real runs of part1 or part2, in the way that suits its expected results
+
+        A dict has the expected test result, plus extra arguments for the test and real runs.
+        A list has one expected result per test file or, with a single test file,
+        per entry in that file's parsed data. Anything else is the expected test result.
+        """
+
+        if isinstance(expectation, dict):
+            return [
+                Evaluation(name, 'test', self.testfiles[0], extra=(expectation.get('test'),),
+                           expected=expectation.get('expected')),
+                Evaluation(name, 'real', self.datafile, extra=(expectation.get('real'),)),
+            ]
+
+        if isinstance(expectation, list):
+            multifile = len(self.testfiles) == len(expectation)
+            tests = [
+                Evaluation(name, 'test', self.testfiles[i] if multifile else self.testfiles[0],
+                           index=None if multifile else i, expected=expected, number=i + 1)
+                for i, expected in enumerate(expectation)
+            ]
+            return tests + [Evaluation(name, 'real', self.datafile, index=None if multifile else 0)]
+
+        return [
+            Evaluation(name, 'test', self.testfiles[0], expected=expectation),
+            Evaluation(name, 'real', self.datafile),
+        ]
+
+    def parsed(self, filename: str) -> Any:
+        """Parse a data file the first time it's needed, and reuse it afterwards"""
+
+        if filename not in self._parsed:
+            self._parsed[filename] = self.measure('parse', self.parse, filename)
+            self.report(f'parse {filename}')
+        return self._parsed[filename]
+
+    def wants(self, kind: str) -> bool:
+        """Whether to run the test or real data"""
+        return self.options.only in (None, kind)
+
+    def arguments(self, evaluation: Evaluation, data: Any = None) -> tuple:
+        """The arguments to pass to the part, from its data file's parsed data, parsing it if it's not given"""
+        if data is None:
+            data = self.parsed(evaluation.filename)
+        if evaluation.index is not None:
+            data = data[evaluation.index]
+        return data, *evaluation.extra
+
+    def evaluate(self, evaluation: Evaluation) -> Any:
+        """Run one evaluation here and now"""
+        return self.measure(evaluation.name, getattr(self, evaluation.name), *self.arguments(evaluation))
+
+    def evaluate_concurrently(self, plan: list[Evaluation]) -> None:
+        """Run every evaluation at once on a pool of workers, then report them in order
+
+        This relies on parts treating their parsed data as immutable (see Puzzle).
+        """
+
+        arguments = [self.arguments(evaluation) for evaluation in plan]
+
+        pool = ProcessPoolExecutor if self.options.pool == 'process' else ThreadPoolExecutor
+        with pool(max_workers=self.options.workers) as executor:
+            futures = [executor.submit(timed, getattr(self, evaluation.name), *args)
+                       for evaluation, args in zip(plan, arguments)]
+            try:
+                for evaluation, future in zip(plan, futures):
+                    result, self._elapsed = future.result()
+                    self.conclude(evaluation, result)
+            except BaseException:
+                executor.shutdown(wait=False, cancel_futures=True)
+                raise
+
+    def conclude(self, evaluation: Evaluation, result: Any) -> None:
+        """Report the result of an evaluation, and check it if it's a test that must pass"""
+        self.report(evaluation.describe(result))
+        if evaluation.kind == 'test' and evaluation.number is None:
+            assert result == evaluation.expected, f'Was {result}, should have been {evaluation.expected}'
+
+    # ----- Benchmark runner --------------------------------------------------
+
+    def benchmark(self, expectations: dict[str, int | dict | list]) -> dict:
+        """Time parse, part1 and part2 on the real data, and save the results as JSON
+
+        Each part is called with the same arguments as its real run, from the expectations given to `run`.
+        """
+
+        warmup, repeat = self.options.warmup, max(1, self.options.repeat)
+        print(f'Benchmarking real data, {warmup} warmup and {repeat} timed runs per phase ...')
+
+        phases = {'parse': None}
+        for name, expectation in expectations.items():
+            phases[name] = next(e for e in self.plan(name, expectation) if e.kind == 'real')
+
+        results = {}
+        for phase, evaluation in phases.items():
+            wall, cpu = [], []
+            for i in range(warmup + repeat):
+                if evaluation is None:
+                    elapsed, used = self.sample(self.parse_data, self.datafile)
                 else:
-                    self.multi_test('part2', test2, self.tests[0], False)
-            else:
-                self.single_test('part2', test2)
-
-    def single_test(self, name: str, expected) -> None:
-        """Execute one test run and one real run for part1 or part2"""
-
-        method = getattr(self, name)
-
-        self.start()
-        test_result = method(self.tests[0])
-        self.stop()
-        print(f'{self.elapsed}: {name} test = {test_result}')
-        assert test_result == expected, f'Was {test_result}, should have been {expected}'
+                    # Each part gets freshly parsed data, since some parsed data memoizes what the parts work out
+                    arguments = self.arguments(evaluation, self.parse(self.datafile))
+                    elapsed, used = self.sample(getattr(self, phase), *arguments)
+                if i >= warmup:
+                    wall.append(elapsed)
+                    cpu.append(used)
+
+            results[phase] = {
+                'wall': vars(Summary.of(wall)),
+                'cpu': vars(Summary.of(cpu)),
+                'samples': {'wall': wall, 'cpu': cpu},
+            }
+
+            for clock in ('wall', 'cpu'):
+                summary = results[phase][clock]
+                print(f'{summary["median"]:10,.3f} ms: {phase} {clock:4} median, '
+                      f'min {summary["min"]:,.3f}, p95 {summary["p95"]:,.3f}, stddev {summary["stddev"]:,.3f}')
+
+        report = {
+            'puzzle': type(self).__name__,
+            'datafile': self.datafile,
+            'warmup': warmup,
+            'repeat': repeat,
+            'gc': self.options.gc,
+            'python': platform.python_version(),
+            'timestamp': time.time(),
+            'phases': results,
+        }
+
+        directory = self.options.benchmark_dir or self.base
+        os.makedirs(directory, exist_ok=True)
+        filename = os.path.join(directory, f'{type(self).__name__.lower()}-benchmark.json')
+        with open(filename, 'w') as bf:
+            json.dump(report, bf, indent=2)
+        print(f'Saved benchmark to {filename}')
+
+        return report
+
+    def sample(self, method: Callable, *args) -> tuple[float, float]:
+        """Time one call, returning wall and CPU time in milliseconds"""
+
+        gc.collect()
+        enabled = gc.isenabled()
+        if not self.options.gc:
+            gc.disable()
+
+        try:
+            wall, cpu = time.perf_counter_ns(), time.process_time_ns()
+            method(*args)
+            cpu, wall = time.process_time_ns() - cpu, time.perf_counter_ns() - wall
+        finally:
+            if enabled:
+                gc.enable()
+
+        return wall / 1_000_000, cpu / 1_000_000
 
-        self.start()
-        real_result = method(self.data)
-        self.stop()
-        print(f'{self.elapsed}: {name} real = {real_result}')
+    # ----- Internal methods --------------------------------------------------
 
-    def multi_test(self, name: str, expectations: list, testdata: list, multifile: bool) -> None:
-        """Execute multiple test runs and one real run for part1 or part2"""
+    def report(self, message: str) -> None:
+        """Print a message with the elapsed time, and memory usage if it's being traced"""
+        print(f'{self.elapsed}: {message}')
+        if self.memory:
+            print(self.memory.last)
 
-        method = getattr(self, name)
+    def measure(self, phase: str, method: Callable, *args) -> Any:
+        """Call a method for a phase of the puzzle, timing and instrumenting it"""
+        with ExitStack() as stack:
+            if self.profiler:
+                stack.enter_context(self.profiler.phase(phase))
+            if self.memory:
+                stack.enter_context(self.memory.phase(phase))
 
-        for i, (test, expected) in enumerate(zip(testdata, expectations), 1):
             self.start()
-            result = method(test)
+            result = method(*args)
             self.stop()
-            passed = 'passed' if result == expected else 'failed'
-            print(f'{self.elapsed}: {name} test {i}, {expected} == {result} => {passed}')
-
-        self.start()
-        real_result = method(self.data) if multifile else method(self.data[0])
-        self.stop()
-        print(f'{self.elapsed}: {name} real = {real_result}')
-
-    def map_test(self, name: str, **keywords: dict) -> None:
-        """Execute one test run and one real run for part1 or part2"""
-
-        method = getattr(self, name)
-        expected = keywords.get('expected')
-        self.start()
-        test_result = method(self.tests[0], keywords.get('test', None))
-        self.stop()
-        print(f'{self.elapsed}: {name} test = {test_result}')
-        assert test_result == expected, f'Was {test_result}, should have been {expected}'
-
-        self.start()
-        real_result = method(self.data, keywords.get('real', None))
-        self.stop()
-        print(f'{self.elapsed}: {name} real = {real_result}')
 
-
-    # ----- Internal methods --------------------------------------------------
+        return result
 
     def start(self):
         """Start a timer"""
@@ -157,49 +825,384 @@ class Puzzle:
         return f'{self._elapsed:10,.3f} ms'
 
 
-@dataclass(order=True, unsafe_hash=True)
-class AstarNode:
-    """A node wrapper for A*Search
-    
-    This class is hashable, but hashes only on the node.
-    This class is sortable, but only on the priority.
+class Stream:
+    """A re-iterable stream of records, parsed one line at a time from a data file"""
+
+    def __init__(self, puzzle: 'StreamingPuzzle', filename: str):
+        self.puzzle = puzzle
+        self.filename = filename
+
+    def __iter__(self) -> Iterator[Any]:
+        return map(self.puzzle.parse_record, self.puzzle.iter_stripped(self.filename))
+
+
+class StreamingPuzzle(Puzzle):
+    """A framework for puzzles whose parts fold over their records in a single pass
+
+    Parsed data is a Stream rather than a list, so memory use doesn't grow with the data file.
+    Each part starts with an accumulator, folds every record into it, then finishes it to get a result.
+    When both parts run, they're folded together in one pass over the file, unless the puzzle is `measuring`,
+    in which case each part folds the file on its own so that its figures are its own.
+
+    Puzzles that can merge two accumulators, with `merge1` and `merge2`, get parallel folds for free:
+    on a machine with more than one CPU, a data file of at least two CHUNK_SIZE chunks is split after
+    a SEPARATOR into chunks that are folded in a process pool, then the accumulators are merged in order.
     """
 
-    node: Any = field(compare=False, hash=True)
-    priority: float = field(compare=True, hash=False, default=0.0)
-    backtrack: 'AstarNode' = field(compare=False, default=None, repr=False)
+    SEPARATOR = b'\n'
+
+    def __init__(self, datafile: str = 'real.data', *testfiles: str):
+        super().__init__(datafile, *testfiles)
+        self._solved: weakref.WeakKeyDictionary[Stream, tuple] = weakref.WeakKeyDictionary()
+
+    def __getstate__(self) -> dict:
+        state = super().__getstate__()
+        del state['_solved']
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._solved = weakref.WeakKeyDictionary()
+
+    # ----- Methods each StreamingPuzzle needs to implement -------------------
+
+    def parse_record(self, line: str) -> Any:
+        """Parse one stripped line of a data file into a record"""
+        raise NotImplementedError('parse_record')
+
+    def start1(self) -> Any:
+        """The initial accumulator for part 1"""
+        raise NotImplementedError('start1')
+
+    def fold1(self, accumulator: Any, record: Any) -> Any:
+        """Fold one record into the part 1 accumulator"""
+        raise NotImplementedError('fold1')
+
+    def finish1(self, accumulator: Any) -> Any:
+        """Turn the final part 1 accumulator into its result"""
+        return accumulator
+
+    def start2(self) -> Any:
+        """The initial accumulator for part 2"""
+        raise NotImplementedError('start2')
+
+    def fold2(self, accumulator: Any, record: Any) -> Any:
+        """Fold one record into the part 2 accumulator"""
+        raise NotImplementedError('fold2')
+
+    def finish2(self, accumulator: Any) -> Any:
+        """Turn the final part 2 accumulator into its result"""
+        return accumulator
+
+    def merge1(self, left: Any, right: Any) -> Any:
+        """Merge the part 1 accumulators of a chunk and the chunk after it, if the puzzle can"""
+        raise NotImplementedError('merge1')
+
+    def merge2(self, left: Any, right: Any) -> Any:
+        """Merge the part 2 accumulators of a chunk and the chunk after it, if the puzzle can"""
+        raise NotImplementedError('merge2')
+
+    # ----- Puzzle methods, implemented by folding ----------------------------
+
+    def parse(self, filename: str) -> Stream:
+        """Streams are lazy, so there's nothing worth caching"""
+        return self.parse_data(filename)
+
+    def parse_data(self, filename: str) -> Stream:
+        return Stream(self, filename)
+
+    def part1(self, data: Stream) -> Any:
+        if self.combined(data):
+            return self.solve(data)[0]
+        return self.finish1(reduce(self.fold1, data, self.start1()))
+
+    def part2(self, data: Stream) -> Any:
+        if self.combined(data):
+            return self.solve(data)[1]
+        return self.finish2(reduce(self.fold2, data, self.start2()))
+
+    def combined(self, data: Stream) -> bool:
+        """Whether to fold both parts in one pass, or in parallel chunks, rather than just the part asked for"""
+        if self.measuring:
+            return False
+        return self.options.part is None or bool(self.chunks(data))
+
+    def chunks(self, data: Stream) -> list[tuple[int, int]]:
+        """The byte ranges to fold in parallel, or nothing if the file is too small or the puzzle can't merge"""
+        if type(self).merge1 is StreamingPuzzle.merge1 or type(self).merge2 is StreamingPuzzle.merge2:
+            return []
+        if (os.cpu_count() or 1) < 2:
+            return []
+        if os.path.getsize(os.path.join(self.base, data.filename)) < 2 * self.CHUNK_SIZE:
+            return []
+        return self.chunk_ranges(data.filename, self.CHUNK_SIZE, self.SEPARATOR)
+
+    def solve(self, data: Stream) -> tuple[Any, Any]:
+        """Fold both parts over the records in a single pass, remembering the results"""
+
+        if data not in self._solved:
+            chunks = self.chunks(data)
+            if chunks:
+                with ProcessPoolExecutor(max_workers=min(len(chunks), os.cpu_count())) as executor:
+                    folded = list(executor.map(self.fold_range, *zip(*[(data.filename, s, e) for s, e in chunks])))
+                accumulator1 = reduce(self.merge1, (a1 for a1, _ in folded))
+                accumulator2 = reduce(self.merge2, (a2 for _, a2 in folded))
+            else:
+                accumulator1, accumulator2 = self.fold_both(data)
+            self._solved[data] = self.finish1(accumulator1), self.finish2(accumulator2)
 
-    def __eq__(self, other: 'AstarNode') -> bool:
-        return self.node == other.node
+        return self._solved[data]
+
+    def fold_range(self, filename: str, start: int, end: int) -> tuple[Any, Any]:
+        """Fold both parts over the records in one byte range of a data file"""
+        return self.fold_both(map(self.parse_record, self.iter_range(filename, start, end)))
+
+    def fold_both(self, records: Iterable[Any]) -> tuple[Any, Any]:
+        fold1, fold2 = self.fold1, self.fold2
+        accumulator1, accumulator2 = self.start1(), self.start2()
+        for record in records:
+            accumulator1 = fold1(accumulator1, record)
+            accumulator2 = fold2(accumulator2, record)
+        return accumulator1, accumulator2
+
+
+class SearchTables:
+    """The scores and parents of one search, which later searches reuse instead of reallocating
+
+    Every entry is stamped with the generation of the search that wrote it, and entries
+    with any other stamp count as unseen, so a new search starts with one increment
+    instead of a fresh set of tables.
+    """
+
+    __slots__ = ('generation', 'stamps', 'scores', 'parents')
+
+    def __init__(self, stamps: Any, scores: Any, parents: Any):
+        self.generation = 0
+        self.stamps = stamps
+        self.scores = scores
+        self.parents = parents
+
+    def next(self) -> int:
+        """Start a new search, returning its generation"""
+        self.generation += 1
+        return self.generation
+
+
+@contextmanager
+def borrowed_tables(owner: Any, factory: Callable[[], SearchTables]) -> Iterator[SearchTables]:
+    """Borrow a spare set of search tables from an object, or make one, and give it back afterwards
+
+    Concurrent searches of the same object each borrow their own tables, so they don't interfere.
+    Tables from different factories are kept apart, since they may be different sizes.
+    """
+    spare = owner.__dict__.setdefault('_spare_tables', {}).setdefault(factory.__name__, [])
+    try:
+        tables = spare.pop()
+    except IndexError:  # Another thread may have taken the last spare since we looked
+        tables = factory()
+    try:
+        yield tables
+    finally:
+        spare.append(tables)
+
+
+class IndexedHeap:
+    """A binary min-heap of distinct items, with O(log n) push, pop and decrease-key
+
+    The heap keeps each item's position in a dict, so pushing an item that's
+    already queued moves it to its new priority instead of adding a duplicate.
+    """
+
+    __slots__ = ('_items', '_priorities', '_positions')
+
+    def __init__(self):
+        self._items: list[Any] = []
+        self._priorities: list[float] = []
+        self._positions: dict[Any, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __contains__(self, item: Any) -> bool:
+        return item in self._positions
+
+    def push(self, item: Any, priority: float) -> None:
+        """Add an item, or change the priority of an item that's already in the heap"""
+        position = self._positions.get(item)
+        if position is None:
+            self._items.append(item)
+            self._priorities.append(priority)
+            self._sift_up(len(self._items) - 1)
+        elif priority < self._priorities[position]:
+            self._priorities[position] = priority
+            self._sift_up(position)
+        else:
+            self._priorities[position] = priority
+            self._sift_down(position)
+
+    def peek(self) -> tuple[Any, float]:
+        """Return the item with the lowest priority, and its priority, without removing it"""
+        return self._items[0], self._priorities[0]
+
+    def pop(self) -> tuple[Any, float]:
+        """Remove and return the item with the lowest priority, and its priority"""
+        items, priorities = self._items, self._priorities
+        item, priority = items[0], priorities[0]
+        del self._positions[item]
+
+        last_item, last_priority = items.pop(), priorities.pop()
+        if items:
+            items[0], priorities[0] = last_item, last_priority
+            self._positions[last_item] = 0
+            self._sift_down(0)
+
+        return item, priority
+
+    def _sift_up(self, position: int) -> None:
+        items, priorities, positions = self._items, self._priorities, self._positions
+        item, priority = items[position], priorities[position]
+
+        while position > 0:
+            parent = (position - 1) >> 1
+            if priorities[parent] <= priority:
+                break
+            items[position], priorities[position] = items[parent], priorities[parent]
+            positions[items[position]] = position
+            position = parent
+
+        items[position], priorities[position] = item, priority
+        positions[item] = position
+
+    def _sift_down(self, position: int) -> None:
+        items, priorities, positions = self._items, self._priorities, self._positions
+        item, priority = items[position], priorities[position]
+        count = len(items)
+
+        while True:
+            child = 2 * position + 1
+            if child >= count:
+                break
+            if child + 1 < count and priorities[child + 1] < priorities[child]:
+                child += 1
+            if priority <= priorities[child]:
+                break
+            items[position], priorities[position] = items[child], priorities[child]
+            positions[items[position]] = position
+            position = child
+
+        items[position], priorities[position] = item, priority
+        positions[item] = position
+
+
+@dataclass
+class SearchStats:
+    """What one search did, and where its time went
+
+    Pass one to AstarSearch.traverse to fill it in. With `tracing`, it also records every expansion in `trace`.
+    """
+
+    tracing: bool = False
+    trace: list[dict] = field(default_factory=list, repr=False)
+    expanded: int = 0
+    generated: int = 0
+    pushes: int = 0
+    pops: int = 0
+    reopened: int = 0
+    max_frontier: int = 0
+    reached: int = 0
+    ns: Counter[str] = field(default_factory=Counter)
+    calls: Counter[str] = field(default_factory=Counter)
+
+    def __str__(self) -> str:
+        return (f'{self.expanded:,} expanded, {self.generated:,} generated, {self.pushes:,} pushed, '
+                f'{self.pops:,} popped, {self.reopened:,} reopened, {self.max_frontier:,} max frontier, '
+                f'{self.reached:,} reached; ' + ', '.join(f'{ns / 1_000_000:,.3f} ms in {self.calls[name]:,} {name}'
+                                                          for name, ns in self.ns.items()))
+
+    def timed(self, name: str, function: Callable) -> Callable:
+        """Wrap a function to add the time spent in it to the named total"""
+        self.ns[name] += 0
+
+        def wrapper(*args):
+            self.calls[name] += 1
+            started = time.perf_counter_ns()
+            try:
+                return function(*args)
+            finally:
+                self.ns[name] += time.perf_counter_ns() - started
+
+        return wrapper
+
+    def expand(self, node: Any, g: float, f: float, frontier: int) -> None:
+        """Count an expansion, and record it in the trace if there is one"""
+        self.expanded += 1
+        if self.tracing:
+            self.trace.append({'step': self.expanded, 'node': node, 'g': g, 'f': f, 'frontier': frontier})
+
+    def dump(self, out: TextIO) -> None:
+        """Write the trace as JSON lines, one per expansion, for plotting or replaying the search"""
+        for step in self.trace:
+            out.write(json.dumps(step, default=lambda o: asdict(o) if is_dataclass(o) else str(o)) + '\n')
 
 
 class AstarSearch:
     """Implement the A* search algorithm for Any type of node
 
-    Each node in the search graph / grid gets wrapped in an AstarNode
-    as it becomes visible in the search.
+    Nodes can be any hashable value. The search keeps their scores and parents in
+    SearchTables, which repeated searches of the same graph reuse.
 
     Subclass this and implement the `neighbors`, `distance`, and `heuristic` methods.
-    Call `traverse` to
+    Call `traverse` to find the shortest path between two nodes, `cost` to find only its cost,
+    `traverse_many` to find the shortest path to a target from any of several origins,
+    or `distances` to find the cost from one node to every node it can reach.
+    `traverse_iterative` finds the same path as `traverse` in memory that only grows with its length.
+
+    The frontier is an IndexedHeap, so finding a better path to a node
+    that's already queued is a decrease-key, not a scan of the frontier.
+
+    When every edge costs a small whole number, declare it in COST_MODEL and the
+    searches skip the heap and the heuristic for a cheaper queue:
+        'unit'      every edge costs 1, so a breadth-first search with a deque
+        'zero-one'  edges cost 0 or 1, so a 0-1 breadth-first search with a double-ended deque
+        'bounded'   edges cost whole numbers from 0 to MAX_COST, so Dial's algorithm with a ring of buckets
+    These expand every node closer than the target, so a good heuristic can still make the general search faster.
+    Every edge they follow is checked against the model, and one that costs anything else raises ValueError.
+
+    `traverse_bidirectional` searches from both ends at once, which needs `reverse_neighbors`
+    and, to be any quicker than `traverse`, `reverse_heuristic` as well.
+
+    Pass a SearchStats to `traverse` or `traverse_many` to count what the search does,
+    and time the calls to `neighbors`, `distance` and `heuristic`.
+
+    Call `changed` whenever the graph changes, so that a DistanceOracle knows to forget it.
 
     Notes: https://en.wikipedia.org/wiki/A*_search_algorithm
     """
 
     UNSEEN = 999_999_999
 
-    def _clear(self):
-        self._lookup: dict[Any, AstarNode] = {}
+    COST_MODEL = 'general'
+    MAX_COST: int = None
 
-    def _find(self, node: Any) -> AstarNode:
-        if node not in self._lookup:
-            self._lookup[node] = AstarNode(node, self.UNSEEN)
-        return self._lookup[node]
+    version = 0
 
-    def _reconstruct_path(self, current: AstarNode) -> list[Any]:
-        path = [current.node]
-        while current.backtrack:
-            current = current.backtrack
-            path.append(current.node)
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        state.pop('_spare_tables', None)
+        return state
+
+    def _tables(self) -> SearchTables:
+        return SearchTables({}, {}, {})
+
+    def changed(self) -> None:
+        """Note that the graph has changed, so distances worked out before no longer hold"""
+        self.version += 1
+
+    def _backtrack(self, parents: dict[Any, Any], current: Any) -> list[Any]:
+        path = []
+        while current is not None:
+            path.append(current)
+            current = parents[current]
 
         path.reverse()
 
@@ -217,34 +1220,819 @@ class AstarSearch:
         """Estimate the cost to get to the goal from a node"""
         raise NotImplementedError('heuristic function')
 
-    def traverse(self, origin: Any, target: Any) -> list[Any]:
-        from collections import defaultdict
-        from heapq import heappush, heappop
+    def reverse_neighbors(self, node: Any) -> list[Any]:
+        """Return a list of all of the nodes that have a node as a neighbor"""
+        raise NotImplementedError('reverse_neighbors function')
+
+    def reverse_heuristic(self, node: Any, origin: Any) -> float:
+        """Estimate the cost to get to a node from the origin, which is never too high if it's 0"""
+        return 0
+
+    def traverse(self, origin: Any, target: Any, stats: SearchStats = None) -> list[Any]:
+        """Return the shortest path from origin to target, or None if there isn't one"""
+        return self.traverse_many([origin], target, stats)
+
+    def traverse_many(self, origins: Iterable[Any], target: Any, stats: SearchStats = None) -> list[Any]:
+        """Return the shortest path to target from whichever origin is closest, or None if there isn't one
+
+        Every origin starts on the frontier at no cost, so this is one search, not one per origin.
+        """
+        return self._search(origins, target, stats, True)[1]
+
+    def cost(self, origin: Any, target: Any, stats: SearchStats = None) -> float:
+        """Return the cost of the shortest path from origin to target, or None if there isn't one
+
+        This is `traverse` without keeping track of the path.
+        """
+        return self._search([origin], target, stats, False)[0]
+
+    def _search(self, origins: Iterable[Any], target: Any, stats: SearchStats,
+                paths: bool) -> tuple[float, list[Any]]:
+        """Search from the origins to target, returning the cost and, if `paths`, the path"""
+
+        neighbors, distance, heuristic = self.neighbors, self.distance, self.heuristic
+        if stats is not None:
+            neighbors = stats.timed('neighbors', neighbors)
+            distance = stats.timed('distance', distance)
+            heuristic = stats.timed('heuristic', heuristic)
+
+        if self.COST_MODEL != 'general':
+            origins = dict.fromkeys(origins)
+            with borrowed_tables(self, self._tables) as tables:
+                reached = self._integer_search(origins, target, neighbors, True, tables, distance)
+                if stats is not None:
+                    # The integer searches have no heap to count, so count what they reach instead
+                    stats.expanded = stats.calls['neighbors']
+                    stats.generated = reached - len(origins)
+                    stats.reached = reached
+                if tables.stamps.get(target) != tables.generation:
+                    return None, None
+                return tables.scores[target], self._backtrack(tables.parents, target) if paths else None
+
+        with borrowed_tables(self, self._tables) as tables:
+            generation = tables.next()
+            stamps, g_score, parents = tables.stamps, tables.scores, tables.parents
+
+            exploring = IndexedHeap()
+            for origin in origins:
+                stamps[origin], g_score[origin] = generation, 0
+                if paths:
+                    parents[origin] = None
+                exploring.push(origin, heuristic(origin))
+
+            if stats is not None:
+                stats.pushes += len(exploring)
+                stats.reached += len(exploring)
+                closed = set()
+
+            while exploring:
+                current, priority = exploring.pop()
+                cost = g_score[current]
+                if stats is not None:
+                    stats.pops += 1
+                    stats.max_frontier = max(stats.max_frontier, len(exploring) + 1)
+                    stats.expand(current, cost, priority, len(exploring))
+                    closed.add(current)
+                if current == target:
+                    return cost, self._backtrack(parents, current) if paths else None
+
+                for node in neighbors(current):
+                    tentative = cost + distance(current, node)
+                    if stamps.get(node) != generation:
+                        stamps[node] = generation
+                        if stats is not None:
+                            stats.reached += 1
+                    elif tentative >= g_score[node]:
+                        continue
+                    g_score[node] = tentative
+                    if paths:
+                        parents[node] = current
+                    exploring.push(node, tentative + heuristic(node))
+                    if stats is not None:
+                        stats.generated += 1
+                        stats.pushes += 1
+                        if node in closed:
+                            stats.reopened += 1
+                            closed.discard(node)
+
+        return None, None
+
+    def traverse_iterative(self, origin: Any, target: Any, stats: SearchStats = None) -> list[Any]:
+        """Return the shortest path from origin to target, or None if there isn't one, using iterative deepening
+
+        IDA* runs a depth-first search that gives up on any path whose priority passes a bound,
+        then raises the bound to the lowest priority it gave up on and tries again. It only keeps
+        the current path, so its memory grows with the depth of the path, not the size of the graph,
+        but it expands the same nodes over and over, so it only pays off when a graph is too big to search
+        any other way. The heuristic must never overestimate.
+
+        Notes: https://en.wikipedia.org/wiki/Iterative_deepening_A*
+        """
+        neighbors, distance, heuristic = self.neighbors, self.distance, self.heuristic
+        if stats is not None:
+            neighbors = stats.timed('neighbors', neighbors)
+            distance = stats.timed('distance', distance)
+            heuristic = stats.timed('heuristic', heuristic)
+
+        if origin == target:
+            return [origin]
+
+        bound = heuristic(origin)
+        while True:
+            # The path so far, the cost of each step along it, and the neighbors still to try from each step
+            path, costs, untried = [origin], [0], [iter(neighbors(origin))]
+            on_path = {origin}
+            beyond = self.UNSEEN
+
+            while untried:
+                current = path[-1]
+                for node in untried[-1]:
+                    if node in on_path:
+                        continue
+                    g = costs[-1] + distance(current, node)
+                    f = g + heuristic(node)
+                    if stats is not None:
+                        stats.generated += 1
+                    if f > bound:
+                        beyond = min(beyond, f)
+                        continue
+                    if node == target:
+                        return path + [node]
+
+                    path.append(node)
+                    costs.append(g)
+                    untried.append(iter(neighbors(node)))
+                    on_path.add(node)
+                    if stats is not None:
+                        stats.expand(node, g, f, len(path))
+                        stats.max_frontier = max(stats.max_frontier, len(path))
+                    break
+                else:
+                    untried.pop()
+                    costs.pop()
+                    on_path.discard(path.pop())
+
+            if beyond == self.UNSEEN:
+                return None
+            bound = beyond
+
+    def traverse_bidirectional(self, origin: Any, target: Any, stats: SearchStats = None) -> list[Any]:
+        """Return the shortest path from origin to target, or None if there isn't one, searching from both ends
+
+        Each step expands the frontier with the lower priority. Every path that hasn't been found yet
+        costs at least the lowest priority on either frontier, so once either frontier's lowest priority
+        reaches the cost of the best path that joins the two searches, that path is the shortest.
+        This is always a heap search, whatever the COST_MODEL.
+        """
+        if origin == target:
+            return [origin]
+
+        neighbors, reverse_neighbors = self.neighbors, self.reverse_neighbors
+        distance, heuristic, reverse_heuristic = self.distance, self.heuristic, self.reverse_heuristic
+        if stats is not None:
+            neighbors = stats.timed('neighbors', neighbors)
+            reverse_neighbors = stats.timed('reverse_neighbors', reverse_neighbors)
+            distance = stats.timed('distance', distance)
+            heuristic = stats.timed('heuristic', heuristic)
+            reverse_heuristic = stats.timed('reverse_heuristic', reverse_heuristic)
+
+        with borrowed_tables(self, self._tables) as forwards, borrowed_tables(self, self._tables) as backwards:
+            # Index 0 searches forwards from the origin, and index 1 backwards from the target
+            tables = [forwards, backwards]
+            generations = [forwards.next(), backwards.next()]
+            expand = [neighbors, reverse_neighbors]
+            cost = [distance, lambda src, dst: distance(dst, src)]
+            estimate = [heuristic, lambda node: reverse_heuristic(node, origin)]
+            exploring = [IndexedHeap(), IndexedHeap()]
+            for side, start in enumerate((origin, target)):
+                tables[side].stamps[start] = generations[side]
+                tables[side].scores[start] = 0
+                tables[side].parents[start] = None
+                exploring[side].push(start, estimate[side](start))
+            reached = 2
+            if stats is not None:
+                stats.pushes += 2
+
+            best, meeting = self.UNSEEN, None
+            while exploring[0] and exploring[1]:
+                lowest = [exploring[0].peek()[1], exploring[1].peek()[1]]
+                if max(lowest) >= best:
+                    break
+
+                side = 0 if lowest[0] <= lowest[1] else 1
+                generation, other_generation = generations[side], generations[1 - side]
+                stamps, scores, parents = tables[side].stamps, tables[side].scores, tables[side].parents
+                other_stamps, other_scores = tables[1 - side].stamps, tables[1 - side].scores
+
+                current, priority = exploring[side].pop()
+                if stats is not None:
+                    stats.pops += 1
+                    stats.max_frontier = max(stats.max_frontier, len(exploring[0]) + len(exploring[1]) + 1)
+                    stats.expand(current, scores[current], priority, len(exploring[side]))
+
+                for node in expand[side](current):
+                    tentative = scores[current] + cost[side](current, node)
+                    if stamps.get(node) != generation:
+                        stamps[node] = generation
+                        reached += 1
+                    elif tentative >= scores[node]:
+                        continue
+                    scores[node] = tentative
+                    parents[node] = current
+                    exploring[side].push(node, tentative + estimate[side](node))
+                    if stats is not None:
+                        stats.generated += 1
+                        stats.pushes += 1
+                    if other_stamps.get(node) == other_generation and tentative + other_scores[node] < best:
+                        best, meeting = tentative + other_scores[node], node
+
+            if stats is not None:
+                stats.reached = reached
+
+            if meeting is None:
+                return None
+
+            path = self._backtrack(forwards.parents, meeting)
+            node = backwards.parents[meeting]
+            while node is not None:
+                path.append(node)
+                node = backwards.parents[node]
+
+            return path
+
+    def distances(self, origin: Any, neighbors: Callable[[Any], Iterable[Any]] = None,
+                  reverse: bool = False) -> dict[Any, float]:
+        """Return the cost of the shortest path from origin to every node that it can reach
+
+        This is Dijkstra's algorithm, a search with no target and no heuristic. Pass the reversed edges
+        as `neighbors`, or `reverse` to use `reverse_neighbors`, to get the cost from every node to origin instead.
+        """
+        if reverse:
+            neighbors = self.reverse_neighbors
+        forward = neighbors is None
+        neighbors = self.neighbors if forward else neighbors
+
+        if self.COST_MODEL != 'general':
+            # The caller keeps the table, so it can't be borrowed, but a fresh one holds only this search's scores
+            tables = self._tables()
+            self._integer_search([origin], None, neighbors, forward, tables)
+            return tables.scores
+
+        distance = self.distance
+
+        costs: dict[Any, float] = {origin: 0}
+        done = set()
+        exploring = IndexedHeap()
+        exploring.push(origin, 0)
+
+        while exploring:
+            current, cost = exploring.pop()
+            done.add(current)
+            for node in neighbors(current):
+                if node in done:
+                    continue
+                tentative = cost + (distance(current, node) if forward else distance(node, current))
+                if tentative < costs.get(node, self.UNSEEN):
+                    costs[node] = tentative
+                    exploring.push(node, tentative)
+
+        return costs
+
+    def _integer_search(self, origins: Iterable[Any], target: Any, neighbors: Callable[[Any], Iterable[Any]],
+                        forward: bool, tables: SearchTables, distance: Callable[[Any, Any], float] = None) -> int:
+        """Search outwards from the origins with the queue that suits COST_MODEL, until target is settled
+
+        The costs of the nodes reached and the node each was reached from go in the tables,
+        under a new generation. Returns how many nodes were reached.
+        """
+        searches = {'unit': self._breadth_first, 'zero-one': self._zero_one, 'bounded': self._buckets}
+        if self.COST_MODEL not in searches:
+            raise ValueError(f'Unknown cost model: {self.COST_MODEL}')
+
+        distance = distance or self.distance
+        if forward:
+            cost = distance
+        else:
+            def cost(src: Any, dst: Any) -> float:
+                return distance(dst, src)
+
+        generation = tables.next()
+        origins = list(dict.fromkeys(origins))
+        for origin in origins:
+            tables.stamps[origin], tables.scores[origin], tables.parents[origin] = generation, 0, None
+
+        return searches[self.COST_MODEL](origins, target, neighbors, cost, tables)
+
+    def _breadth_first(self, origins, target, neighbors, cost, tables) -> int:
+        generation, stamps, costs, parents = tables.generation, tables.stamps, tables.scores, tables.parents
+        reached = len(origins)
+
+        queue = deque(origins)
+        while queue:
+            current = queue.popleft()
+            if current == target:
+                break
+            tentative = costs[current] + 1
+            for node in neighbors(current):
+                step = cost(current, node)
+                if step != 1:
+                    raise ValueError(f'Edge from {current} to {node} costs {step}, not 1')
+                if stamps.get(node) != generation:
+                    stamps[node] = generation
+                    costs[node] = tentative
+                    parents[node] = current
+                    queue.append(node)
+                    reached += 1
+
+        return reached
+
+    def _zero_one(self, origins, target, neighbors, cost, tables) -> int:
+        generation, stamps, costs, parents = tables.generation, tables.stamps, tables.scores, tables.parents
+        reached = len(origins)
+
+        # Free edges go to the front of the queue, so it stays in order of cost.
+        # A node is queued again whenever its cost improves, so skip entries that are out of date.
+        queue = deque((0, origin) for origin in origins)
+        while queue:
+            queued, current = queue.popleft()
+            if queued != costs[current]:
+                continue
+            if current == target:
+                break
+            for node in neighbors(current):
+                step = cost(current, node)
+                if step != 0 and step != 1:
+                    raise ValueError(f'Edge from {current} to {node} costs {step}, not 0 or 1')
+                tentative = queued + step
+                if stamps.get(node) != generation:
+                    stamps[node] = generation
+                    reached += 1
+                elif tentative >= costs[node]:
+                    continue
+                costs[node] = tentative
+                parents[node] = current
+                if step:
+                    queue.append((tentative, node))
+                else:
+                    queue.appendleft((tentative, node))
+
+        return reached
+
+    def _buckets(self, origins, target, neighbors, cost, tables) -> int:
+        bound = self.MAX_COST
+        if bound is None or bound < 0:
+            raise ValueError('A bounded cost model needs a MAX_COST')
+
+        generation, stamps, costs, parents = tables.generation, tables.stamps, tables.scores, tables.parents
+        reached = len(origins)
+
+        # Every queued node costs less than MAX_COST more than the cheapest, so a ring of buckets covers them all.
+        # A node is queued again whenever its cost improves, so skip entries that are out of date.
+        buckets = [[] for _ in range(bound + 1)]
+        buckets[0].extend(origins)
+        queued = len(buckets[0])
+
+        current_cost = 0
+        while queued:
+            bucket = buckets[current_cost % len(buckets)]
+            while bucket:
+                current = bucket.pop()
+                queued -= 1
+                if costs[current] != current_cost:
+                    continue
+                if current == target:
+                    return reached
+                for node in neighbors(current):
+                    step = cost(current, node)
+                    if not 0 <= step <= bound or step != int(step):
+                        raise ValueError(f'Edge from {current} to {node} costs {step}, not 0 to {bound}')
+                    tentative = current_cost + step
+                    if stamps.get(node) != generation:
+                        stamps[node] = generation
+                        reached += 1
+                    elif tentative >= costs[node]:
+                        continue
+                    costs[node] = tentative
+                    parents[node] = current
+                    buckets[tentative % len(buckets)].append(node)
+                    queued += 1
+            current_cost += 1
+
+        return reached
+
+
+class GridSearch:
+    """A* search over a rectangular grid of byte-sized cells, where every node is a flat index into the grid
+
+    Subclass this and implement `passable`. Every move to an adjacent cell costs 1,
+    so the heuristic is the Manhattan distance to the target.
+
+    The moves out of each cell are worked out once, as a bitmask of directions.
+    The search keeps its scores and predecessors in SearchTables of flat arrays indexed by node,
+    which later searches reuse, so a search hashes nothing and allocates nothing per node
+    but its heap entries.
+    Paths are lists of indices, like the lists of nodes from AstarSearch.traverse.
+    """
 
-        self._clear()
+    UNSEEN = AstarSearch.UNSEEN
+
+    version = 0
+
+    def __init__(self, cells: bytes, rows: int, cols: int):
+        self.cells = bytearray(cells)
+        self.rows, self.cols = rows, cols
+        self.count = rows * cols
+
+        # Direction bits and the index offset of the cell in each direction
+        self.offsets = ((1, -cols), (2, -1), (4, cols), (8, 1))
+        self.moves = self._moves()
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        state.pop('_spare_tables', None)
+        return state
+
+    def passable(self, here: int, there: int) -> bool:
+        """True if the search can move from one cell to an adjacent one"""
+        raise NotImplementedError('passable function')
+
+    def _moves(self) -> bytearray:
+        """Find the directions that the search can move in from every cell"""
+        moves = bytearray(self.count)
+        for index in range(self.count):
+            moves[index] = self._mask(index)
+        return moves
+
+    def _mask(self, index: int) -> int:
+        """Find the directions that the search can move in from one cell"""
+        cols, passable = self.cols, self.passable
+        row, col = divmod(index, cols)
+        mask = 0
+        if row > 0 and passable(index, index - cols):
+            mask |= 1
+        if col > 0 and passable(index, index - 1):
+            mask |= 2
+        if row < self.rows - 1 and passable(index, index + cols):
+            mask |= 4
+        if col < cols - 1 and passable(index, index + 1):
+            mask |= 8
+        return mask
+
+    def update(self, index: int, value: int) -> None:
+        """Change one cell, and the moves into and out of it"""
+        self.cells[index] = value
+        self.moves[index] = self._mask(index)
+        for _, offset in self.offsets:
+            neighbor = index + offset
+            if 0 <= neighbor < self.count:
+                self.moves[neighbor] = self._mask(neighbor)
+        self.version += 1
+
+    def index(self, row: int, col: int) -> int:
+        return row * self.cols + col
+
+    def position(self, index: int) -> tuple[int, int]:
+        return divmod(index, self.cols)
+
+    def neighbors(self, index: int) -> list[int]:
+        """Return a list of the cells that the search can move to from a cell"""
+        mask = self.moves[index]
+        return [index + offset for bit, offset in self.offsets if mask & bit]
+
+    def _tables(self) -> SearchTables:
+        return SearchTables(array('I', bytes(4 * self.count)), array('i', bytes(4 * self.count)),
+                            array('i', bytes(4 * self.count)))
+
+    def _jump_tables(self) -> SearchTables:
+        # One entry for each cell and the direction the search arrived from
+        return SearchTables(array('I', bytes(16 * self.count)), array('i', bytes(16 * self.count)),
+                            array('i', bytes(16 * self.count)))
+
+    def _reconstruct_path(self, parents: array, current: int) -> list[int]:
+        path = [current]
+        while parents[current] >= 0:
+            current = parents[current]
+            path.append(current)
 
-        a_origin = self._find(origin)
-        a_target = self._find(target)
+        path.reverse()
 
-        exploring: list[AstarNode] = []
-        heappush(exploring, a_origin)
+        return path
 
-        g_score: dict[AstarNode, int] = defaultdict(lambda: self.UNSEEN)
-        g_score[a_origin] = 0
+    def traverse(self, origin: int, target: int) -> list[int]:
+        """Return the shortest path from origin to target, or None if there isn't one"""
+        return self.traverse_many([origin], target)
+
+    def traverse_many(self, origins: Iterable[int], target: int) -> list[int]:
+        """Return the shortest path to target from whichever origin is closest, or None if there isn't one"""
+        return self._search(origins, target, True)[1]
+
+    def cost(self, origin: int, target: int) -> int:
+        """Return the number of moves from origin to target, or None if there's no way there
+
+        This is `traverse` without keeping track of the path.
+        """
+        return self._search([origin], target, False)[0]
+
+    def _search(self, origins: Iterable[int], target: int, paths: bool) -> tuple[int, list[int]]:
+        """Search from the origins to target, returning the cost and, if `paths`, the path"""
+        moves, offsets, cols = self.moves, self.offsets, self.cols
+        target_row, target_col = divmod(target, cols)
+
+        with borrowed_tables(self, self._tables) as tables:
+            generation = tables.next()
+            stamps, g_score, parents = tables.stamps, tables.scores, tables.parents
+
+            # Stale heap entries are skipped when popped, instead of being moved by a decrease-key
+            exploring = []
+            for origin in origins:
+                stamps[origin], g_score[origin], parents[origin] = generation, 0, -1
+                row, col = divmod(origin, cols)
+                heappush(exploring, (abs(row - target_row) + abs(col - target_col), 0, origin))
+
+            while exploring:
+                _, cost, current = heappop(exploring)
+                if current == target:
+                    return cost, self._reconstruct_path(parents, current) if paths else None
+                if cost > g_score[current]:
+                    continue
+
+                mask = moves[current]
+                tentative = cost + 1
+                for bit, offset in offsets:
+                    if mask & bit:
+                        neighbor = current + offset
+                        if stamps[neighbor] != generation:
+                            stamps[neighbor] = generation
+                        elif tentative >= g_score[neighbor]:
+                            continue
+                        g_score[neighbor] = tentative
+                        if paths:
+                            parents[neighbor] = current
+                        row, col = divmod(neighbor, cols)
+                        heappush(exploring, (tentative + abs(row - target_row) + abs(col - target_col),
+                                             tentative, neighbor))
+
+        return None, None
+
+    def distances(self, origin: int, reverse: bool = False) -> array:
+        """Return the cost of the shortest path from origin to every cell, UNSEEN for those it can't reach
+
+        With `reverse`, follow the moves backwards, to get the cost from every cell to origin instead.
+        Since every move costs 1, this is a breadth-first search.
+        """
+        moves, offsets, count = self.moves, self.offsets, self.count
+        # A move into a cell in one direction is a move out of the neighbor in the opposite direction
+        opposite = {1: 4, 2: 8, 4: 1, 8: 2}
+
+        costs = array('i', [self.UNSEEN]) * count
+        costs[origin] = 0
+        frontier = [origin]
+        cost = 0
+        while frontier:
+            cost += 1
+            following = []
+            for current in frontier:
+                mask = moves[current]
+                for bit, offset in offsets:
+                    neighbor = current + offset
+                    if reverse:
+                        if not (0 <= neighbor < count and moves[neighbor] & opposite[bit]):
+                            continue
+                    elif not mask & bit:
+                        continue
+                    if costs[neighbor] == self.UNSEEN:
+                        costs[neighbor] = cost
+                        following.append(neighbor)
+            frontier = following
+
+        return costs
+
+    def traverse_jumps(self, origin: int, target: int) -> list[int]:
+        """Return the shortest path from origin to target, or None if there isn't one, with Jump Point Search
+
+        Of all the shortest paths that only differ in the order of their moves, this only looks for the one
+        that moves sideways as early as it can. So it jumps along straight lines without queueing the cells
+        it passes, and only stops at a jump point, where that path might turn.
+
+        A sideways run looks up and down from every cell it passes, and stops where either look finds a jump point.
+        An up or down run stops at a cell it can move sideways out of, unless the same move
+        was possible a step earlier, followed by the same up or down move.
+        Since every run is one move type, this works with moves that go one way but not back, like day 12's.
+        The search state is a cell and the direction the search arrived from, and the path comes back
+        with every cell on it, just like from `traverse`.
+
+        Notes: https://en.wikipedia.org/wiki/Jump_point_search
+        """
+        if origin == target:
+            return [origin]
+
+        moves, cols = self.moves, self.cols
+        target_row, target_col = divmod(target, cols)
+        sideways = ((2, -1), (8, 1))
+        upright = ((1, -cols), (4, cols))
+        # Where each direction bit comes in the state index of a cell
+        slot = {1: 0, 2: 1, 4: 2, 8: 3}
+
+        def forced(previous: int, here: int, bit: int, offset: int, vertical: int) -> bool:
+            """True if a run that came up or down from previous must turn sideways at here"""
+            return bool(moves[here] & bit) and not (moves[previous] & bit and moves[previous + offset] & vertical)
+
+        def jump_upright(here: int, bit: int, offset: int) -> int:
+            while moves[here] & bit:
+                previous, here = here, here + offset
+                if here == target:
+                    return here
+                for side, step in sideways:
+                    if forced(previous, here, side, step, bit):
+                        return here
+            return -1
+
+        def jump_sideways(here: int, bit: int, offset: int) -> int:
+            while moves[here] & bit:
+                here += offset
+                if here == target:
+                    return here
+                for vertical, step in upright:
+                    if jump_upright(here, vertical, step) >= 0:
+                        return here
+            return -1
+
+        def successors(here: int, arrived: int) -> Iterator[tuple[int, int]]:
+            """Yield each jump point reachable from a cell, and the direction bit it was reached in"""
+            if arrived == 0:
+                runs = [(jump_sideways, b, o) for b, o in sideways] + [(jump_upright, b, o) for b, o in upright]
+            elif arrived in (2, 8):
+                offset = -1 if arrived == 2 else 1
+                runs = [(jump_sideways, arrived, offset)] + [(jump_upright, b, o) for b, o in upright]
+            else:
+                offset = -cols if arrived == 1 else cols
+                previous = here - offset
+                runs = [(jump_upright, arrived, offset)] + [(jump_sideways, b, o) for b, o in sideways
+                                                            if forced(previous, here, b, o, arrived)]
+            for run, bit, offset in runs:
+                point = run(here, bit, offset)
+                if point >= 0:
+                    yield point, bit
+
+        with borrowed_tables(self, self._jump_tables) as tables:
+            generation = tables.next()
+            stamps, g_score, parents = tables.stamps, tables.scores, tables.parents
+
+            # Heap entries are (f, g, cell, direction bit it was reached in, state index), and -1 is the origin
+            row, col = divmod(origin, cols)
+            exploring = [(abs(row - target_row) + abs(col - target_col), 0, origin, 0, -1)]
+
+            while exploring:
+                _, cost, here, arrived, state = heappop(exploring)
+                if here == target:
+                    return self._unfold(parents, state, origin)
+                if state >= 0 and cost > g_score[state]:
+                    continue
+
+                for point, bit in successors(here, arrived):
+                    tentative = cost + abs(point - here) // (cols if bit in (1, 4) else 1)
+                    following = 4 * point + slot[bit]
+                    if stamps[following] != generation:
+                        stamps[following] = generation
+                    elif tentative >= g_score[following]:
+                        continue
+                    g_score[following] = tentative
+                    parents[following] = state
+                    row, col = divmod(point, cols)
+                    heappush(exploring, (tentative + abs(row - target_row) + abs(col - target_col),
+                                         tentative, point, bit, following))
 
-        while len(exploring):
-            current = heappop(exploring)
-            if current == a_target:
-                return self._reconstruct_path(current)
+        return None
 
-            for node in self.neighbors(current.node):
-                neighbor = self._find(node)
-                tentative = g_score[current] + self.distance(current.node, neighbor.node)
-                if tentative < g_score[neighbor]:
-                    neighbor.backtrack = current
-                    g_score[neighbor] = tentative
-                    neighbor.priority = tentative + self.heuristic(neighbor.node)
-                    if neighbor not in exploring:
-                        heappush(exploring, neighbor)
+    def _unfold(self, parents: array, state: int, origin: int) -> list[int]:
+        """Rebuild a path of every cell from a chain of jump point states"""
+        points = []
+        while state >= 0:
+            points.append(state // 4)
+            state = parents[state]
+        points.append(origin)
+        points.reverse()
 
-        return None
+        path = [origin]
+        for start, end in zip(points, points[1:]):
+            step = (self.cols if abs(end - start) >= self.cols else 1) * (1 if end > start else -1)
+            path.extend(range(start + step, end + step, step))
+
+        return path
+
+
+class DistanceOracle:
+    """Answer distance queries from one-to-all distance tables, remembering the most recently used tables
+
+    A query is answered from the table of costs from its origin, or to its target, if either is remembered.
+    Otherwise the oracle works out a table for whichever endpoint has been asked about more often, or the
+    target if it's a tie, since many queries to one target are the usual case.
+
+    The tables are kept in least recently used order, and the oldest are forgotten once they use more
+    than `limit_mb` megabytes. All of them are forgotten when the graph's version changes.
+    Works with both AstarSearch, which makes dict tables, and GridSearch, which makes array tables.
+    """
+
+    def __init__(self, search: AstarSearch | GridSearch, limit_mb: float = 64):
+        self.search = search
+        self.limit = limit_mb * 1024 * 1024
+        self.version = search.version
+        self.tables: dict[tuple[bool, Any], Any] = {}
+        self.sizes: dict[tuple[bool, Any], int] = {}
+        self.queries: Counter[tuple[bool, Any]] = Counter()
+        self.hits = self.misses = 0
+        self.lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.tables)
+
+    @property
+    def size(self) -> int:
+        """Approximate bytes used by the remembered tables"""
+        return sum(self.sizes.values())
+
+    def distance(self, origin: Any, target: Any) -> float:
+        """Return the cost of the shortest path from origin to target, or None if there isn't one"""
+        source, sink = (False, origin), (True, target)
+        with self.lock:
+            self._check_version()
+            self.queries[source] += 1
+            self.queries[sink] += 1
+            for key, node in ((source, target), (sink, origin)):
+                if key in self.tables:
+                    self.hits += 1
+                    return self._cost(self._recall(key), node)
+            self.misses += 1
+            forwards = self.queries[source] > self.queries[sink]
+
+        if forwards:
+            return self._cost(self.costs_from(origin), target)
+        return self._cost(self.costs_to(target), origin)
+
+    def costs_from(self, origin: Any) -> Any:
+        """Return the table of costs from origin to every node"""
+        return self._table((False, origin))
+
+    def costs_to(self, target: Any) -> Any:
+        """Return the table of costs from every node to target"""
+        return self._table((True, target))
+
+    def clear(self) -> None:
+        """Forget every table"""
+        with self.lock:
+            self.tables.clear()
+            self.sizes.clear()
+            self.queries.clear()
+
+    def _cost(self, table: Any, node: Any) -> float:
+        try:
+            cost = table[node]
+        except (KeyError, IndexError):
+            return None
+        return None if cost >= self.search.UNSEEN else cost
+
+    def _check_version(self) -> None:
+        if self.search.version != self.version:
+            self.tables.clear()
+            self.sizes.clear()
+            self.queries.clear()
+            self.version = self.search.version
+
+    @staticmethod
+    def _measure(table: Any) -> int:
+        """Approximate bytes used by a table, counting the keys and values of a dict as well as the dict itself"""
+        size = sys.getsizeof(table)
+        if isinstance(table, dict):
+            for key, value in table.items():
+                size += sys.getsizeof(key) + sys.getsizeof(value)
+                if hasattr(key, '__dict__'):
+                    size += sys.getsizeof(key.__dict__)
+        return size
+
+    def _recall(self, key: tuple[bool, Any]) -> Any:
+        """Return a remembered table, moving it to the most recently used end"""
+        table = self.tables.pop(key)
+        self.tables[key] = table
+        return table
+
+    def _table(self, key: tuple[bool, Any]) -> Any:
+        with self.lock:
+            self._check_version()
+            if key in self.tables:
+                return self._recall(key)
+            version = self.version
+
+        reverse, node = key
+        table = self.search.distances(node, reverse=reverse)
+
+        with self.lock:
+            # Don't remember a table for a graph that changed while it was being worked out
+            if self.search.version == version:
+                self.tables[key] = table
+                self.sizes[key] = self._measure(table)
+                while len(self.tables) > 1 and self.size > self.limit:
+                    oldest = next(iter(self.tables))
+                    del self.tables[oldest]
+                    del self.sizes[oldest]
+
+        return table
@@ -1,31 +1,78 @@
+import random
+
 from common import *
+from heapq import heapify, heappushpop, nlargest
+from typing import TextIO
+
+
+# The calories carried by each Elf in test.data
+TEST_ELVES = [6000, 4000, 11000, 24000, 10000]
 
 
 def convert_to_int(x): return int(x) if x else None
 
 
-class Day01(Puzzle):
+class Day01(StreamingPuzzle):
+    """Each record is a snack's calories, or None between Elves
+
+    Part 2 keeps a heap of the `--top` Elves with the most calories, 3 by default, so memory stays constant.
+    Large data files are split between Elves and folded in parallel.
+    """
+
+    SEPARATOR = b'\n\n'
+
+    def parse_record(self, line: str) -> int | None:
+        return convert_to_int(line)
+
+    def start1(self) -> tuple[int, int]:
+        return 0, 0
+
+    def fold1(self, elves: tuple[int, int], snack: int | None) -> tuple[int, int]:
+        current, most = elves
+        if snack is None:
+            return 0, max(most, current)
+        return current + snack, most
+
+    def finish1(self, elves: tuple[int, int]) -> int:
+        current, most = elves
+        return max(most, current)
+
+    def merge1(self, left: tuple[int, int], right: tuple[int, int]) -> tuple[int, int]:
+        return right[0], max(left[1], left[0], right[1])
+
+    def start2(self) -> tuple[int, list[int]]:
+        return 0, [0] * self.options.top
 
-    def parse_data(self, filename) -> list:
-        numbers = map(convert_to_int, self.read_stripped(filename))
+    def fold2(self, elves: tuple[int, list[int]], snack: int | None) -> tuple[int, list[int]]:
+        current, top = elves
+        if snack is None:
+            heappushpop(top, current)
+            return 0, top
+        return current + snack, top
 
-        snacks = [0]
-        for n in numbers:
-            if n is None:
-                snacks.append(0)
-            else:
-                snacks[-1] += n
+    def merge2(self, left: tuple[int, list[int]], right: tuple[int, list[int]]) -> tuple[int, list[int]]:
+        # Chunks end between Elves, so the left chunk has no Elf left over
+        top = nlargest(self.options.top, left[1] + right[1] + [left[0]])
+        heapify(top)
+        return right[0], top
 
-        snacks.sort()
+    def finish2(self, elves: tuple[int, list[int]]) -> int:
+        current, top = elves
+        heappushpop(top, current)
+        return sum(top)
 
-        return snacks
+    def generate(self, out: TextIO, scale: int, rng: random.Random) -> None:
+        for elf in range(250 * scale):
+            if elf:
+                out.write('\n')
+            for _ in range(rng.randint(1, 15)):
+                out.write(f'{rng.randint(1000, 60000)}\n')
 
-    def part1(self, data) -> int:
-        return max(data)
 
-    def part2(self, data) -> int:
-        return sum(data[-3:])
+def main():
+    puzzle = Day01()
+    puzzle.run(24000, sum(sorted(TEST_ELVES, reverse=True)[:puzzle.options.top]))
 
 
-puzzle = Day01()
-puzzle.run(24000, 45000)
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,9 @@
 #! /usr/bin/env python3
 
+import random
+
 from dataclasses import dataclass
+from typing import TextIO
 
 from common import *
 
@@ -42,22 +45,57 @@ class Advice:
         outcome = ((response - opponent + 1) % 3) * 3
         return outcome
 
-    @classmethod
-    def parse(cls, line: str) -> "Advice":
-        opponent, advice = line.split(' ')
-        return cls(opponent, advice)
+
+# There are only nine kinds of round, so score each kind once
+ROUNDS = [Advice(opponent, advice) for opponent in 'ABC' for advice in 'XYZ']
+PAIRS = [f'{r.opponent} {r.advice}'.encode() for r in ROUNDS]
+SCORES1 = [r.score1 for r in ROUNDS]
+SCORES2 = [r.score2 for r in ROUNDS]
+
 
 class Day02(Puzzle):
+    """The parsed data is how many times each of the nine kinds of round appears"""
+
+    def parse_data(self, filename: str) -> list[int]:
+        counts = self.bincount(self.read_mapped(filename)) if numpy is not None else None
+        if counts is None:
+            counts = [0] * len(PAIRS)
+            for chunk in self.iter_chunks(filename):
+                for kind, pair in enumerate(PAIRS):
+                    counts[kind] += chunk.count(pair)
+        return counts
+
+    @staticmethod
+    def bincount(data: bytes) -> list[int] | None:
+        """Count the kinds of round with NumPy, if every line is exactly one letter, a space and a letter"""
+        buffer = numpy.frombuffer(data, dtype=numpy.uint8)
+        if len(buffer) % 4 not in (0, 3):
+            return None
+
+        opponents, advice = buffer[0::4], buffer[2::4]
+        if not ((buffer[1::4] == ord(' ')).all() and (buffer[3::4] == ord('\n')).all()
+                and ((opponents >= ord('A')) & (opponents <= ord('C'))).all()
+                and ((advice >= ord('X')) & (advice <= ord('Z'))).all()):
+            return None
+
+        kinds = (opponents.astype(numpy.intp) - ord('A')) * 3 + (advice.astype(numpy.intp) - ord('X'))
+        return numpy.bincount(kinds, minlength=len(PAIRS)).tolist()
+
+    def part1(self, counts: list[int]) -> int:
+        return sum(count * score for count, score in zip(counts, SCORES1))
+
+    def part2(self, counts: list[int]) -> int:
+        return sum(count * score for count, score in zip(counts, SCORES2))
 
-    def parse_data(self, filename):
-        return list(map(Advice.parse, self.read_stripped(filename)))
+    def generate(self, out: TextIO, scale: int, rng: random.Random) -> None:
+        for _ in range(2500 * scale):
+            out.write(f'{rng.choice("ABC")} {rng.choice("XYZ")}\n')
 
-    def part1(self, data) -> int:
-        return sum(match.score1 for match in data)
 
-    def part2(self, data) -> int:
-        return sum(match.score2 for match in data)
+def main():
+    puzzle = Day02()
+    puzzle.run(15, 12)
 
 
-puzzle = Day02()
-puzzle.run(15, 12)
+if __name__ == '__main__':
+    main()
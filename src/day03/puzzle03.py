@@ -1,62 +1,131 @@
 #! /usr/bin/env python3
 
+import random
+import string
+
+from array import array
 from dataclasses import dataclass
+from typing import TextIO
 
 from common import *
 
+# Each item type is one bit of a mask, so that its priority is the mask's bit length
+ITEMS = string.ascii_letters.encode()
+BITS = [0] * 256
+for bit, item in enumerate(ITEMS):
+    BITS[item] = 1 << bit
 
-@dataclass
-class RuckSack:
 
-    contents: str
+def priority(mask: int) -> int:
+    """The priority of the lowest item type in a mask, or 0 if it's empty"""
+    return (mask & -mask).bit_length()
 
-    @property
-    def common_items(self):
-        self.count = len(self.contents)
-        assert self.count % 2 == 0, f'{self.count} items in {self.contents}'
 
-        half = int(self.count / 2)
-        self.compartment1 = self.contents[:half]
-        self.compartment2 = self.contents[half:]
-        assert len(self.compartment1) == len(self.compartment2)
+@dataclass
+class Priorities:
+    """The priority of the item in both compartments of each rucksack, and of each group's badge"""
 
-        self.set1 = set(self.compartment1)
-        self.set2 = set(self.compartment2)
+    common: array
+    badges: array
 
-        return list(self.set1 & self.set2)
 
-    @property
-    def total_common_priorities(self):
-        return sum(list(map(self.priority, self.common_items)))
+class Day03(Puzzle):
+    """Rucksacks are parsed straight from the raw bytes into masks of their item types
+
+    The masks of each compartment are ANDed for part 1, and the masks of each group of three rucksacks
+    are ANDed for part 2, in the same pass.
+    """
+
+    def parse_data(self, filename: str) -> Priorities:
+        priorities = self.batch(self.read_mapped(filename)) if numpy is not None else None
+        if priorities is None:
+            priorities = Priorities(array('B'), array('B'))
+            bits, group, members = BITS, 0, 0
+            for chunk in self.iter_chunks(filename):
+                for line in chunk.split():
+                    if len(line) % 2 or line.translate(None, ITEMS):
+                        raise ValueError(f'Unexpected rucksack {line}')
+
+                    half = len(line) // 2
+                    left = right = 0
+                    for item in line[:half]:
+                        left |= bits[item]
+                    for item in line[half:]:
+                        right |= bits[item]
+                    priorities.common.append(priority(left & right))
+
+                    group = group & (left | right) if members else left | right
+                    members += 1
+                    if members == 3:
+                        priorities.badges.append(priority(group))
+                        members = 0
+        return priorities
 
     @staticmethod
-    def priority(item: str) -> int:
-        order = ord(item)
-        if ord('a') <= order and order <= ord('z'):
-            return order - ord('a') + 1
-        if ord('A') <= order and order <= ord('Z'):
-            return order - ord('A') + 27
+    def batch(data: bytes) -> Priorities | None:
+        """Find the priorities with NumPy, if every line is a non-empty rucksack of an even number of items"""
+        buffer = numpy.frombuffer(data, dtype=numpy.uint8)
+        bits = numpy.array(BITS, dtype=numpy.uint64)[buffer]
+        newlines = buffer == ord('\n')
+        if ((bits == 0) & ~newlines).any():
+            return None
+
+        ends = numpy.flatnonzero(newlines)
+        if len(buffer) and not newlines[-1]:
+            ends = numpy.append(ends, len(buffer))
+        starts = numpy.concatenate(([0], ends[:-1] + 1))
+        lengths = ends - starts
+        if not len(lengths) or (lengths == 0).any() or (lengths % 2).any():
+            return None
+
+        # OR each half of each line, where the right half runs on over the newline, whose mask is empty
+        halves = numpy.bitwise_or.reduceat(bits, numpy.stack((starts, starts + lengths // 2), axis=1).ravel())
+        left, right = halves[0::2], halves[1::2]
+        full = left | right
+        groups = len(full) - len(full) % 3
+        badges = full[0:groups:3] & full[1:groups:3] & full[2:groups:3]
+
+        return Priorities(Day03.lowest(left & right), Day03.lowest(badges))
 
-        raise ValueError(f'Unexpected {item}')
+    @staticmethod
+    def lowest(masks: 'numpy.ndarray') -> array:
+        """The priority of the lowest item type in each mask, from the exponent of its lowest bit as a float"""
+        lowest = masks & (~masks + numpy.uint64(1))
+        return array('B', numpy.frexp(lowest.astype(numpy.float64))[1].astype(numpy.uint8).tobytes())
 
+    def part1(self, priorities: Priorities) -> int:
+        return sum(priorities.common)
 
-class Day03(Puzzle):
+    def part2(self, priorities: Priorities) -> int:
+        return sum(priorities.badges)
 
-    def parse_data(self, filename):
-        return list(map(RuckSack, self.read_stripped(filename)))
+    def generate(self, out: TextIO, scale: int, rng: random.Random) -> None:
+        for _ in range(100 * scale):
+            # Each Elf in a group draws from its own letters, plus the group's badge
+            badge, *others = rng.sample(string.ascii_letters, 52)
+            for elf in range(3):
+                out.write(self.generate_sack(rng, badge, others[17 * elf:17 * elf + 17]) + '\n')
 
-    def part1(self, data) -> int:
-        return sum(sack.total_common_priorities for sack in data)
+    @staticmethod
+    def generate_sack(rng: random.Random, badge: str, letters: list[str]) -> str:
+        """Make the contents of a rucksack with exactly one item in both compartments"""
+        common, *rest = letters
+        left, right = [common] + rest[:8], [common] + rest[8:]
+        (left if rng.random() < 0.5 else right).append(badge)
 
-    def part2(self, data) -> int:
-        result = 0
+        size = rng.randint(max(len(left), len(right)), 24)
+        halves = []
+        for pool in (left, right):
+            half = pool + rng.choices(pool, k=size - len(pool))
+            rng.shuffle(half)
+            halves.append(''.join(half))
+        return ''.join(halves)
 
-        for sacks in [data[i:i + 3] for i in range(0, len(data), 3)]:
-            for badge in set(sacks[0].contents) & set(sacks[1].contents) & set(sacks[2].contents):
-                result += RuckSack.priority(badge)
 
-        return result
+def main():
+    puzzle = Day03()
+    puzzle.run(157, 70)
 
 
-puzzle = Day03()
-puzzle.run(157, 70)
+if __name__ == '__main__':
+    main()
@@ -1,49 +1,161 @@
 #! /usr/bin/env python3
 
-import re
+import random
 
+from array import array
+from bisect import bisect_right
 from common import *
 from dataclasses import dataclass
+from functools import cached_property
+from typing import TextIO
+
+SEPARATORS = bytes.maketrans(b'-,', b'  ')
 
 
 @dataclass
-class CleanupRange:
-    head1: int
-    tail1: int
-    head2: int
-    tail2: int
-
-    @property
-    def wholly_contained(self) -> bool:
-        first = self.head1 <= self.head2 <= self.tail2 <= self.tail1
-        second = self.head2 <= self.head1 <= self.tail1 <= self.tail2
-        return first or second
-
-    @property
-    def partial_overlap(self):
-        t1 = self.head1 <= self.head2 <= self.tail1
-        t2 = self.head2 <= self.head1 <= self.tail2
-        t3 = self.head1 <= self.tail2 <= self.tail1
-        t4 = self.head2 <= self.tail1 <= self.tail2
-        return t1 or t2 or t3 or t4
+class IntervalNode:
+    """A node of a centered interval tree, holding the assignments that include its center section"""
+
+    center: int
+    by_head: list[tuple[int, int]]
+    by_tail: list[tuple[int, int]]
+    left: 'IntervalNode' = None
+    right: 'IntervalNode' = None
 
     @classmethod
-    def parse(cls, line):
-        h1, t1, h2, t2 = map(int, re.split('[-,]', line))
-        return cls(h1, t1, h2, t2)
+    def build(cls, assignments: list[tuple[int, int, int]]) -> 'IntervalNode':
+        """Build a tree of (head, tail, pair) assignments, split at the median endpoint"""
+        if not assignments:
+            return None
+
+        endpoints = sorted(end for head, tail, _ in assignments for end in (head, tail))
+        center = endpoints[len(endpoints) // 2]
+
+        here = [a for a in assignments if a[0] <= center <= a[1]]
+        return cls(
+            center,
+            sorted((head, pair) for head, _, pair in here),
+            sorted(((tail, pair) for _, tail, pair in here), reverse=True),
+            cls.build([a for a in assignments if a[1] < center]),
+            cls.build([a for a in assignments if a[0] > center]),
+        )
+
+
+class SectionIndex:
+    """Find the pairs of Elves assigned to a section, or to any of a range of sections, without scanning every pair
+
+    Covering queries walk down a centered interval tree, which is O(log n) deep, and at each node
+    read only the assignments that include the section. A range [first, last] is overlapped by the
+    assignments that cover its first section, plus those that start later in the range, which are
+    found by bisecting a list of assignments sorted by their first section.
+    """
+
+    def __init__(self, assignments: 'Assignments'):
+        intervals = [(head, tail, pair) for pair, (h1, t1, h2, t2) in enumerate(assignments)
+                     for head, tail in ((h1, t1), (h2, t2))]
+
+        self.root = IntervalNode.build(intervals)
+
+        intervals.sort()
+        self.heads = [head for head, _, _ in intervals]
+        self.pairs = [pair for _, _, pair in intervals]
+
+    def stab(self, section: int) -> Iterator[int]:
+        """The pair of every assignment that covers a section, once for each of its Elves"""
+        node = self.root
+        while node:
+            if section < node.center:
+                for head, pair in node.by_head:
+                    if head > section:
+                        break
+                    yield pair
+                node = node.left
+            elif section > node.center:
+                for tail, pair in node.by_tail:
+                    if tail < section:
+                        break
+                    yield pair
+                node = node.right
+            else:
+                yield from (pair for _, pair in node.by_head)
+                break
+
+    def covering(self, section: int) -> list[int]:
+        """The pairs with at least one Elf assigned to a section"""
+        return sorted(set(self.stab(section)))
+
+    def overlapping(self, first: int, last: int) -> list[int]:
+        """The pairs with at least one Elf assigned to any of the sections from first to last"""
+        if first > last:
+            return []
+        later = self.pairs[bisect_right(self.heads, first):bisect_right(self.heads, last)]
+        return sorted(set(self.stab(first)).union(later))
+
+
+class Assignments:
+    """The section assignments of every pair of Elves, as four columns of integers"""
+
+    def __init__(self, values: array):
+        if len(values) % 4:
+            raise ValueError(f'{len(values)} section numbers is not a whole number of pairs')
+        self.values = values
+        self.head1, self.tail1, self.head2, self.tail2 = (values[column::4] for column in range(4))
+
+    def __len__(self) -> int:
+        return len(self.head1)
+
+    def __iter__(self) -> Iterator[tuple[int, int, int, int]]:
+        return zip(self.head1, self.tail1, self.head2, self.tail2)
+
+    @cached_property
+    def index(self) -> SectionIndex:
+        return SectionIndex(self)
+
+    def columns(self) -> 'numpy.ndarray':
+        """The four columns as NumPy arrays, sharing the parsed values"""
+        return numpy.frombuffer(self.values, dtype=numpy.intc).reshape(-1, 4).T
+
+    def wholly_contained(self) -> int:
+        """How many pairs have one Elf's sections wholly within the other's"""
+        if numpy is not None:
+            h1, t1, h2, t2 = self.columns()
+            return int((((h1 <= h2) & (t2 <= t1)) | ((h2 <= h1) & (t1 <= t2))).sum())
+        return sum((h1 <= h2 and t2 <= t1) or (h2 <= h1 and t1 <= t2) for h1, t1, h2, t2 in self)
+
+    def partial_overlap(self) -> int:
+        """How many pairs have at least one section in common"""
+        if numpy is not None:
+            h1, t1, h2, t2 = self.columns()
+            return int(((h1 <= t2) & (h2 <= t1)).sum())
+        return sum(h1 <= t2 and h2 <= t1 for h1, t1, h2, t2 in self)
 
 
 class Day04(Puzzle):
+    """Every section number is parsed in bulk, then each part counts the pairs a comparison of the columns holds for"""
+
+    def parse_data(self, filename: str) -> Assignments:
+        values = array('i')
+        for chunk in self.iter_chunks(filename):
+            values.extend(map(int, chunk.translate(SEPARATORS).split()))
+        return Assignments(values)
+
+    def part1(self, assignments: Assignments) -> int:
+        return assignments.wholly_contained()
+
+    def part2(self, assignments: Assignments) -> int:
+        return assignments.partial_overlap()
 
-    def parse_data(self, filename):
-        return list(map(CleanupRange.parse,  self.read_stripped(filename)))
+    def generate(self, out: TextIO, scale: int, rng: random.Random) -> None:
+        for _ in range(1000 * scale):
+            h1, t1 = sorted(rng.randint(1, 99) for _ in range(2))
+            h2, t2 = sorted(rng.randint(1, 99) for _ in range(2))
+            out.write(f'{h1}-{t1},{h2}-{t2}\n')
 
-    def part1(self, data) -> int:
-        return len(list(filter(lambda x: x.wholly_contained, data)))
 
-    def part2(self, data) -> int:
-        return len(list(filter(lambda x: x.partial_overlap, data)))
+def main():
+    puzzle = Day04()
+    puzzle.run(2, 4)
 
 
-puzzle = Day04()
-puzzle.run(2, 4)
+if __name__ == '__main__':
+    main()
@@ -1,7 +1,12 @@
 #! /usr/bin/env python3
 
+import copy
+import random
+import string
+
 from dataclasses import dataclass
 from collections import OrderedDict
+from typing import TextIO
 
 from common import *
 
@@ -33,39 +38,50 @@ class Stacks:
         for number in numbers:
             self.initial[number] = list()
 
+        # Stacks are lists with the top crate at the end, so build them from the bottom level up
         for level in lines[1:]:
             for stack, pos in enumerate(range(1, len(level), 4), 1):
                 crate = level[pos]
                 if crate != ' ':
-                    self.initial[str(stack)].insert(0, crate)
+                    self.initial[str(stack)].append(crate)
 
-    def initialize(self):
-        self.stacks = OrderedDict()
+    def initialize(self) -> 'Stacks':
+        """Make a working copy to move crates in, leaving the initial stacks untouched"""
+        working = copy.copy(self)
+        working.stacks = OrderedDict()
         for key, value in self.initial.items():
-            self.stacks[key] = value.copy()
+            working.stacks[key] = value.copy()
+        return working
 
     def move_9000_crates(self, move: Move) -> None:
-        for i in range(move.qty):
-            crate = self.stacks[move.src].pop(0)
-            self.stacks[move.dst].insert(0, crate)
-
-    def execute_9000(self, moves: list[Move]) -> None:
-        self.initialize()
+        """Move crates one at a time, which leaves them in reverse order on the destination"""
+        src = self.stacks[move.src]
+        split = len(src) - move.qty
+        self.stacks[move.dst].extend(reversed(src[split:]))
+        del src[split:]
+
+    def execute_9000(self, moves: list[Move]) -> 'Stacks':
+        working = self.initialize()
         for move in moves:
-            self.move_9000_crates(move)
+            working.move_9000_crates(move)
+        return working
 
     def move_9001_crates(self, move: Move) -> None:
-        self.stacks[move.dst] = self.stacks[move.src][:move.qty] + self.stacks[move.dst]
-        del self.stacks[move.src][:move.qty]
-
-    def execute_9001(self, moves: list[Move]) -> None:
-        self.initialize()
+        """Move crates all at once, which keeps them in order"""
+        src = self.stacks[move.src]
+        split = len(src) - move.qty
+        self.stacks[move.dst].extend(src[split:])
+        del src[split:]
+
+    def execute_9001(self, moves: list[Move]) -> 'Stacks':
+        working = self.initialize()
         for move in moves:
-            self.move_9001_crates(move)
+            working.move_9001_crates(move)
+        return working
 
     @property
     def top_crate_names(self) -> str:
-        return ''.join(stack[0] for stack in self.stacks.values())
+        return ''.join(stack[-1] for stack in self.stacks.values())
 
 
 @dataclass
@@ -75,12 +91,10 @@ class Orders:
     moves: list[Move]
 
     def part1(self) -> str:
-        self.stacks.execute_9000(self.moves)
-        return self.stacks.top_crate_names
+        return self.stacks.execute_9000(self.moves).top_crate_names
 
     def part2(self) -> str:
-        self.stacks.execute_9001(self.moves)
-        return self.stacks.top_crate_names
+        return self.stacks.execute_9001(self.moves).top_crate_names
 
 
 class Day05(Puzzle):
@@ -99,6 +113,28 @@ class Day05(Puzzle):
     def part2(self, orders: Orders) -> str:
         return orders.part2()
 
+    def generate(self, out: TextIO, scale: int, rng: random.Random) -> None:
+        heights = [rng.randint(1, 8 * scale) for _ in range(9)]
+
+        for level in range(max(heights), 0, -1):
+            crates = [f'[{rng.choice(string.ascii_uppercase)}]' if height >= level else '   ' for height in heights]
+            out.write(' '.join(crates) + ' \n')
+        out.write(' '.join(f' {stack} ' for stack in range(1, 10)) + ' \n\n')
+
+        # Never empty a stack, so that every stack has a top crate at the end
+        for _ in range(500 * scale):
+            src = rng.choice([stack for stack, height in enumerate(heights) if height > 1])
+            dst = rng.choice([stack for stack in range(9) if stack != src])
+            qty = rng.randint(1, min(heights[src] - 1, 30))
+            heights[src] -= qty
+            heights[dst] += qty
+            out.write(f'move {qty} from {src + 1} to {dst + 1}\n')
+
+
+def main():
+    puzzle = Day05()
+    puzzle.run('CMZ', 'MCD')
+
 
-puzzle = Day05()
-puzzle.run('CMZ', 'MCD')
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,9 @@
 #! /usr/bin/env python3
 
+import random
+
 from common import *
+from typing import TextIO
 
 
 class Day06(Puzzle):
@@ -21,9 +24,22 @@ class Day06(Puzzle):
     def part2(self, data) -> int:
         return self.detect_marker(data, 14)
 
+    def generate(self, out: TextIO, scale: int, rng: random.Random) -> None:
+        # Three letters can't make a marker, so both searches scan almost the whole stream
+        noise = ''.join(rng.choices('abc', k=4096 * scale - 26))
+        out.write(noise + 'abcdefghijklmnopqrstuvwxyz\n')
+
+    def generated(self, data):
+        return data[0]
+
+
+def main():
+    puzzle = Day06()
+    puzzle.run(
+        [7, 5, 6, 10, 11],
+        [19, 23, 23, 29, 26]
+    )
+
 
-puzzle = Day06()
-puzzle.run(
-    [7, 5, 6, 10, 11],
-    [19, 23, 23, 29, 26]
-)
+if __name__ == '__main__':
+    main()
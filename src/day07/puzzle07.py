@@ -1,8 +1,11 @@
 #! /usr/bin/env python3
 
+import random
+
 from common import *
 from dataclasses import dataclass, field
 from functools import cached_property
+from typing import Iterable, TextIO
 
 @dataclass
 class Directory:
@@ -27,9 +30,9 @@ class Directory:
 class Day07(Puzzle):
 
     def parse_data(self, filename):
-        return self.parse_commands(self.read_stripped(filename))
+        return self.parse_commands(self.iter_stripped(filename))
 
-    def parse_commands(self, lines: list[str]) -> Directory:
+    def parse_commands(self, lines: Iterable[str]) -> Directory:
         result = Directory()
 
         for line in lines:
@@ -62,6 +65,42 @@ class Day07(Puzzle):
 
         return candidates[0].size
 
-
-puzzle = Day07()
-puzzle.run(95437, 24933642)
+    def generate(self, out: TextIO, scale: int, rng: random.Random) -> None:
+        # Attach each new directory to a random earlier one, which keeps the tree shallow
+        children = [[] for _ in range(180 * scale)]
+        for child in range(1, len(children)):
+            children[rng.randrange(child)].append(child)
+
+        # Spread 38 MB over the files, then add 12 MB to d1, so part 2 needs 10 MB and d1 can provide it
+        weights = [[rng.random() for _ in range(rng.randint(0, 3))] for _ in children]
+        total = sum(map(sum, weights))
+        sizes = [[max(1, int(38_000_000 * w / total)) for w in files] for files in weights]
+        sizes[1].append(12_000_000)
+
+        out.write('$ cd /\n')
+        pending = [0]
+        while pending:
+            directory = pending.pop()
+            if directory is None:
+                out.write('$ cd ..\n')
+                continue
+
+            if directory:
+                out.write(f'$ cd d{directory}\n')
+            out.write('$ ls\n')
+            for child in children[directory]:
+                out.write(f'dir d{child}\n')
+            for file, size in enumerate(sizes[directory]):
+                out.write(f'{size} f{file}.txt\n')
+
+            for child in reversed(children[directory]):
+                pending.extend([None, child])
+
+
+def main():
+    puzzle = Day07()
+    puzzle.run(95437, 24933642)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,7 +1,11 @@
 #! /usr/bin/env python3
 
+import math
+import random
+
 from common import *
 from functools import cache
+from typing import TextIO
 
 
 class Grid:
@@ -72,6 +76,16 @@ class Day08(Puzzle):
     def part2(self, data) -> int:
         return data.most_scenic
 
+    def generate(self, out: TextIO, scale: int, rng: random.Random) -> None:
+        size = round(99 * math.sqrt(scale))
+        for _ in range(size):
+            out.write(''.join(rng.choices('0123456789', k=size)) + '\n')
+
+
+def main():
+    puzzle = Day08()
+    puzzle.run(21, 8)
+
 
-puzzle = Day08()
-puzzle.run(21, 8)
+if __name__ == '__main__':
+    main()
@@ -1,7 +1,11 @@
 #! /usr/bin/env python3
 
+import copy
+import random
+
 from common import *
 from dataclasses import dataclass
+from typing import TextIO
 
 
 @dataclass
@@ -75,19 +79,23 @@ class Rope:
         self.positions: list[Position] = None
         self.track: set[Position] = None
 
-    def twist(self, length):
-        self.positions = [Position(0,0)] * length
-        self.track = set()
+    def twist(self, length) -> 'Rope':
+        """Pull a working copy of the rope through the moves, leaving this one untouched"""
+        rope = copy.copy(self)
+        rope.positions = [Position(0,0)] * length
+        rope.track = set()
 
         head = 0
         tail = -1
 
-        for move in self.moves:
+        for move in rope.moves:
             for step in range(move.length):
-                self.positions[head] = self.positions[head] + move.direction
+                rope.positions[head] = rope.positions[head] + move.direction
                 for knot in range(1, length):
-                    self.positions[knot] = self.positions[knot] >> self.positions[knot-1]
-                self.track.add(self.positions[tail])
+                    rope.positions[knot] = rope.positions[knot] >> rope.positions[knot-1]
+                rope.track.add(rope.positions[tail])
+
+        return rope
 
     def print(self, positions, mark=None):
         xl = min(0, min(p.x for p in positions))
@@ -118,17 +126,24 @@ class Rope:
 class Day09(Puzzle):
 
     def parse_data(self, filename):
-        moves = list(map(Move.parse, self.read_stripped(filename)))
+        moves = list(map(Move.parse, self.iter_stripped(filename)))
         return Rope(moves)
 
     def part1(self, data) -> int:
-        data.twist(2)
-        return len(data.track)
+        return len(data.twist(2).track)
 
     def part2(self, data) -> int:
-        data.twist(10)
-        return len(data.track)
+        return len(data.twist(10).track)
+
+    def generate(self, out: TextIO, scale: int, rng: random.Random) -> None:
+        for _ in range(2000 * scale):
+            out.write(f'{rng.choice("RLUD")} {rng.randint(1, 19)}\n')
+
+
+def main():
+    puzzle = Day09('real.data', 'test1.data', 'test2.data')
+    puzzle.run(13, [1, 36])
 
 
-puzzle = Day09('real.data', 'test1.data', 'test2.data')
-puzzle.run(13, [1, 36])
+if __name__ == '__main__':
+    main()
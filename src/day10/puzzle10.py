@@ -1,53 +1,86 @@
 #! /usr/bin/env python3
 
+import random
+
 from common import *
+from dataclasses import dataclass, field
+from typing import Iterator, TextIO
+
+
+@dataclass
+class Instruction:
+    cycles: int
+    value: int
+
+    @classmethod
+    def parse(cls, line: str) -> 'Instruction':
+        match line.split(' '):
+            case 'addx', value:
+                return cls(2, int(value))
+            case 'noop', :
+                return cls(1, 0)
 
+        raise ValueError(f'Could not parse: {line}')
 
+
+@dataclass
 class Signal:
+    """The X register, followed through the cycles of each instruction"""
 
-    def __init__(self, lines: list[str]):
-        self.cycle: list[int] = []
-
-        x = 1
-        for line in lines:
-            tokens = line.split(' ')
-            op = tokens[0]
-            if op == 'addx':
-                value = int(tokens[1])
-                self.cycle.append(x)
-                self.cycle.append(x)
-                x += int(value)
-            elif op == 'noop':
-                self.cycle.append(x)
-
-    @property
-    def signal_strengths(self) -> int:
-        times = [20, 60, 100, 140, 180, 220]
-        return sum(t * self.cycle[t - 1] for t in times)
-
-    @property
-    def image(self) -> str:
-        image = ''
-        for t, sprite in enumerate(self.cycle):
-            pixel = t % 40
+    x: int = 1
+    cycle: int = 0
+    strengths: int = 0
+    pixels: list[str] = field(default_factory=list)
 
-            if pixel == 0:
-                image += '\n'
-            image += '#' if sprite - 1 <= pixel <= sprite + 1 else '.'
+    def during(self, instruction: Instruction) -> Iterator[int]:
+        """Execute an instruction, yielding the number of each cycle while it runs"""
+        for _ in range(instruction.cycles):
+            self.cycle += 1
+            yield self.cycle
+        self.x += instruction.value
+
+
+class Day10(StreamingPuzzle):
 
-        return image
+    TIMES = {20, 60, 100, 140, 180, 220}
 
+    def parse_record(self, line: str) -> Instruction:
+        return Instruction.parse(line)
 
-class Day10(Puzzle):
+    def start1(self) -> Signal:
+        return Signal()
 
-    def parse_data(self, filename):
-        return Signal(self.read_stripped(filename))
+    def fold1(self, signal: Signal, instruction: Instruction) -> Signal:
+        for cycle in signal.during(instruction):
+            if cycle in self.TIMES:
+                signal.strengths += cycle * signal.x
+        return signal
 
-    def part1(self, data) -> int:
-        return data.signal_strengths
+    def finish1(self, signal: Signal) -> int:
+        return signal.strengths
 
-    def part2(self, data) -> str:
-        return data.image
+    def start2(self) -> Signal:
+        return Signal()
+
+    def fold2(self, signal: Signal, instruction: Instruction) -> Signal:
+        for cycle in signal.during(instruction):
+            pixel = (cycle - 1) % 40
+
+            if pixel == 0:
+                signal.pixels.append('\n')
+            signal.pixels.append('#' if signal.x - 1 <= pixel <= signal.x + 1 else '.')
+        return signal
+
+    def finish2(self, signal: Signal) -> str:
+        return ''.join(signal.pixels)
+
+    def generate(self, out: TextIO, scale: int, rng: random.Random) -> None:
+        # Part 1 samples the first 220 cycles, which takes at most 220 instructions
+        for _ in range(max(220, 150 * scale)):
+            if rng.random() < 0.3:
+                out.write('noop\n')
+            else:
+                out.write(f'addx {rng.randint(-20, 20)}\n')
 
 
 t2 = """
@@ -58,5 +91,11 @@ t2 = """
 ######......######......######......####
 #######.......#######.......#######....."""
 
-puzzle = Day10()
-puzzle.run(13140, t2)
+
+def main():
+    puzzle = Day10()
+    puzzle.run(13140, t2)
+
+
+if __name__ == '__main__':
+    main()
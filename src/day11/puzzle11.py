@@ -1,8 +1,11 @@
 #! /usr/bin/env python3
 
+import copy
+import random
 import re
 from dataclasses import dataclass
 from enum import Enum
+from typing import TextIO
 
 from common import *
 
@@ -85,8 +88,11 @@ class Monkeys:
         for monkey in self.initial:
             self.modulo *= monkey.divisor
 
-    def initialize(self):
-        self.monkeys = [monkey.clone() for monkey in self.initial]
+    def initialize(self) -> 'Monkeys':
+        """Make a working copy to play with, leaving the initial monkeys untouched"""
+        working = copy.copy(self)
+        working.monkeys = [monkey.clone() for monkey in self.initial]
+        return working
 
     def round_with_relief(self):
         for monkey in self.monkeys:
@@ -124,19 +130,31 @@ class Day11(Puzzle):
         return Monkeys(self.read_stripped(filename))
 
     def part1(self, data) -> int:
-        data.initialize()
+        monkeys = data.initialize()
         for _ in range(20):
-            data.round_with_relief()
-        return data.two_most_active
+            monkeys.round_with_relief()
+        return monkeys.two_most_active
 
     def part2(self, data) -> int:
-        data.initialize()
+        monkeys = data.initialize()
         for _ in range(10000):
-            data.round()
+            monkeys.round()
 
-        return data.two_most_active
+        return monkeys.two_most_active
 
+    def generate(self, out: TextIO, scale: int, rng: random.Random) -> None:
+        # Keep the real monkeys, whose worry levels are known to stay in range, but give them more items
+        for line in self.read_lines(self.datafile):
+            if line.strip().startswith('Starting items:'):
+                items = ', '.join(str(rng.randint(50, 99)) for _ in range(rng.randint(1, 8) * scale))
+                line = f'  Starting items: {items}\n'
+            out.write(line)
 
-puzzle = Day11()
-puzzle.run(10605, 2713310158)
 
+def main():
+    puzzle = Day11()
+    puzzle.run(10605, 2713310158)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,105 +1,86 @@
 #! /usr/bin/env python3
 
-from common import *
-from dataclasses import dataclass
-from functools import cache
-from sortedcontainers import SortedDict, SortedList
-
+import math
+import random
 
-@dataclass(frozen=True)
-class Position:
-    row: int
-    col: int
+from common import *
+from typing import TextIO
 
-    def __add__(self, other: 'Position') -> 'Position':
-        return Position(self.row + other.row, self.col + other.col)
 
-class Map(AstarSearch):
+class Map(GridSearch):
     """The map can generate optimum traversal paths"""
-    
-    DIRECTIONS = [Position(-1, 0), Position(0, -1), Position(1, 0), Position(0, 1)]
 
-    def __init__(self, raw: str):
-        super().__init__()
-
-        # Parse the Grid
-        self.grid = [list(map(lambda x: ord(x) - ord('`'), list(l))) for l in raw.splitlines()]
+    # Heights are a to z, the origin S is at height a, and the target E is one above z
+    HEIGHTS = bytes.maketrans(b'SE' + bytes(range(ord('a'), ord('z') + 1)), bytes([1, 27]) + bytes(range(1, 27)))
 
+    def __init__(self, raw: bytes):
         # Calculate the grid size
-        self.rows = len(self.grid)
-        self.cols = len(self.grid[0])
-        self.count = self.rows * self.cols
+        cols = raw.find(b'\n')
+        if cols < 0:
+            cols = len(raw)
+        rows = (len(raw) + 1) // (cols + 1)
+
+        # Parse the grid into one row after another
+        width = cols + 1
+        flat = b''.join(raw[r * width:r * width + cols] for r in range(rows))
+        super().__init__(flat.translate(self.HEIGHTS), rows, cols)
 
         # Find the origin and target positions
-        self.origin = self.offset(raw.index('S'))
-        self.target = self.offset(raw.index('E'))
-        self[self.origin] = 1
-        self[self.target] = 27
-
-    def __setitem__(self, pos: Position, value: int) -> None:
-        """Set a grid value by position"""
-        self.grid[pos.row][pos.col] = value
-
-    def __getitem__(self, pos: Position) -> int:
-        """Get a grid value by position"""
-        return self.grid[pos.row][pos.col]
-
-    def offset(self, index: int) -> Position:
-        row = int(index / (self.cols + 1))
-        col = index - row * (self.cols + 1)
-        return Position(row, col)
-
-    def valid(self, pos: Position) -> bool:
-        return (0 <= pos.row < self.rows) and (0 <= pos.col < self.cols)
-
-    def scalable(self, here: Position, there: Position) -> bool:
-        return (self[there] - self[here]) <= 1
-
-    @cache
-    def neighbors(self, node: Position) -> list[Position]:
-        """Return a list of all of the neighbors of a node"""
-        neighbors = []
-        for direction in self.DIRECTIONS:
-            neighbor = node + direction
-            if self.valid(neighbor) and self.scalable(node, neighbor):
-                neighbors.append(neighbor)
-        return neighbors
-
-    def distance(self, src: Position, dst: Position) -> float:
-        """Distance between two nodes"""
-        rows = abs(src.row - dst.row)
-        cols = abs(src.col - dst.col)
-        return rows + cols
-
-    def heuristic(self, node: Position) -> float:
-        """Estimate the cost to get to the goal from a node"""
-        return self.distance(node, self.target)
-
-    def ground_level_starts(self) -> list[Position]:
-        return [Position(r, c)
-                for r in range(self.rows)
-                for c in range(self.cols)
-                if self.grid[r][c] == 1]
+        self.origin = flat.find(b'S')
+        self.target = flat.find(b'E')
+
+    def __getitem__(self, index: int) -> int:
+        """Get a grid value by index"""
+        return self.cells[index]
+
+    def scalable(self, here: int, there: int) -> bool:
+        return (self.cells[there] - self.cells[here]) <= 1
+
+    def passable(self, here: int, there: int) -> bool:
+        return self.scalable(here, there)
+
+    def ground_level_starts(self) -> list[int]:
+        return [index for index, height in enumerate(self.cells) if height == 1]
 
 
 class Day12(Puzzle):
 
     def parse_data(self, filename):
-        return Map(self.read_blob(filename))
+        return Map(self.read_mapped(filename))
 
     def part1(self, map: Map) -> int:
-        path = map.traverse(map.origin, map.target)
-        return len(path) - 1
+        return map.cost(map.origin, map.target)
 
     def part2(self, map: Map) -> int:
-        shortest = 999_999
-        for start in map.ground_level_starts():
-            path = map.traverse(start, map.target)
-            if path is not None:
-                shortest = min(shortest, len(path) - 1)
-
-        return shortest
-
-
-puzzle = Day12()
-puzzle.run(31, 29)
+        # One search back down from the summit finds the distance from every ground level start at once
+        costs = map.distances(map.target, reverse=True)
+        return min(costs[start] for start in map.ground_level_starts())
+
+    def generate(self, out: TextIO, scale: int, rng: random.Random) -> None:
+        rows, cols = round(41 * math.sqrt(scale)), round(77 * math.sqrt(scale))
+        middle = rows // 2
+
+        # A west to east slope up to the summit, with holes and peaks off the middle row, which is always climbable
+        for row in range(rows):
+            line = []
+            for col in range(cols):
+                height = min(26, 1 + 26 * col // (cols - 1))
+                if row != middle:
+                    chance = rng.random()
+                    if chance < 0.15:
+                        height = max(1, height - rng.randint(2, 6))
+                    elif chance < 0.30:
+                        height = min(26, height + rng.randint(2, 6))
+                line.append(chr(ord('`') + height))
+            if row == middle:
+                line[0], line[-1] = 'S', 'E'
+            out.write(''.join(line) + '\n')
+
+
+def main():
+    puzzle = Day12()
+    puzzle.run(31, 29)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,8 +1,11 @@
 #! /usr/bin/env python3
 
+import random
+
 from common import *
 from itertools import zip_longest
 from functools import cmp_to_key
+from typing import TextIO
 
 
 def cmp(a: int, b: int) -> int:
@@ -13,11 +16,8 @@ class Day13(Puzzle):
     """Distress Signal"""
 
     def parse_data(self, filename):
-        lines = self.read_stripped(filename)
-        return [[
-                eval(lines[i]),
-                eval(lines[i + 1])]
-                for i in range(0, len(lines), 3)]
+        lines = filter(None, self.iter_stripped(filename))
+        return [[eval(left), eval(right)] for left, right in zip(lines, lines)]
 
     def compare(self, left: list | int, right: list | int) -> int:
         """Compare nested lists of integers"""
@@ -68,6 +68,31 @@ class Day13(Puzzle):
 
         return decoder
 
+    def generate(self, out: TextIO, scale: int, rng: random.Random) -> None:
+        for pair in range(150 * scale):
+            if pair:
+                out.write('\n')
+            for _ in range(2):
+                packet = self.generate_packet(rng, 4)
+                while packet in ([[2]], [[6]]):
+                    packet = self.generate_packet(rng, 4)
+                out.write(str(packet).replace(' ', '') + '\n')
+
+    def generate_packet(self, rng: random.Random, depth: int) -> list:
+        """Make a random packet, nested no more than depth lists deep"""
+        packet = []
+        for _ in range(rng.randint(0, 5)):
+            if depth > 1 and rng.random() < 0.3:
+                packet.append(self.generate_packet(rng, depth - 1))
+            else:
+                packet.append(rng.randint(0, 10))
+        return packet
+
+
+def main():
+    puzzle = Day13()
+    puzzle.run(13, 140)
+
 
-puzzle = Day13()
-puzzle.run(13, 140)
+if __name__ == '__main__':
+    main()
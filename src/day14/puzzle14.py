@@ -1,7 +1,12 @@
 #! /usr/bin/env python3
 
+import copy
+import math
+import random
+
 from common import *
 from enum import Enum
+from typing import TextIO
 
 
 Tile = Enum('Tile', 'Air Rock Sand')
@@ -104,6 +109,10 @@ class Cave:
         return None
 
     def fill_with_sand(self, floor: bool) -> int:
+        """Pour sand into a working copy of the cave, leaving this one untouched"""
+        return copy.copy(self).pour_sand(floor)
+
+    def pour_sand(self, floor: bool) -> int:
 
         self.mark_walls(floor)
 
@@ -148,6 +157,26 @@ class Day14(Puzzle):
     def part2(self, cave) -> int:
         return cave.fill_with_sand(True)
 
+    def generate(self, out: TextIO, scale: int, rng: random.Random) -> None:
+        # The area sand can fill grows with the square of the depth, so scale the depth by the square root
+        depth, width = round(170 * math.sqrt(scale)), round(40 * math.sqrt(scale))
+
+        for _ in range(150 * scale):
+            row, col = rng.randint(10, depth), rng.randint(500 - width, 500 + width)
+            corners = [f'{col},{row}']
+            for segment in range(rng.randint(1, 6)):
+                if segment % 2:
+                    row = min(depth, max(10, row + rng.randint(-8, 8)))
+                else:
+                    col += rng.randint(-8, 8)
+                corners.append(f'{col},{row}')
+            out.write(' -> '.join(corners) + '\n')
+
+
+def main():
+    puzzle = Day14()
+    puzzle.run(24, 93)
+
 
-puzzle=Day14()
-puzzle.run(24, 93)
+if __name__ == '__main__':
+    main()
@@ -15,5 +15,10 @@ class Day15(Puzzle):
         return 0
 
 
-puzzle = Day15()
-puzzle.run()
+def main():
+    puzzle = Day15()
+    puzzle.run()
+
+
+if __name__ == '__main__':
+    main()
@@ -15,5 +15,10 @@ class Day16(Puzzle):
         return 0
 
 
-puzzle = Day16()
-puzzle.run()
+def main():
+    puzzle = Day16()
+    puzzle.run()
+
+
+if __name__ == '__main__':
+    main()
@@ -15,5 +15,10 @@ class Day17(Puzzle):
         return 0
 
 
-puzzle = Day17()
-puzzle.run()
+def main():
+    puzzle = Day17()
+    puzzle.run()
+
+
+if __name__ == '__main__':
+    main()
@@ -15,5 +15,10 @@ class Day18(Puzzle):
         return 0
 
 
-puzzle = Day18()
-puzzle.run()
+def main():
+    puzzle = Day18()
+    puzzle.run()
+
+
+if __name__ == '__main__':
+    main()
@@ -15,5 +15,10 @@ class Day19(Puzzle):
         return 0
 
 
-puzzle = Day19()
-puzzle.run()
+def main():
+    puzzle = Day19()
+    puzzle.run()
+
+
+if __name__ == '__main__':
+    main()
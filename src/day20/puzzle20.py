@@ -15,5 +15,10 @@ class Day20(Puzzle):
         return 0
 
 
-puzzle = Day20()
-puzzle.run()
+def main():
+    puzzle = Day20()
+    puzzle.run()
+
+
+if __name__ == '__main__':
+    main()
@@ -15,5 +15,10 @@ class Day21(Puzzle):
         return 0
 
 
-puzzle = Day21()
-puzzle.run()
+def main():
+    puzzle = Day21()
+    puzzle.run()
+
+
+if __name__ == '__main__':
+    main()
@@ -15,5 +15,10 @@ class Day22(Puzzle):
         return 0
 
 
-puzzle = Day22()
-puzzle.run()
+def main():
+    puzzle = Day22()
+    puzzle.run()
+
+
+if __name__ == '__main__':
+    main()
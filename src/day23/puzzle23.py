@@ -15,5 +15,10 @@ class Day23(Puzzle):
         return 0
 
 
-puzzle = Day23()
-puzzle.run()
+def main():
+    puzzle = Day23()
+    puzzle.run()
+
+
+if __name__ == '__main__':
+    main()
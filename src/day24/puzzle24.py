@@ -15,5 +15,10 @@ class Day24(Puzzle):
         return 0
 
 
-puzzle = Day24()
-puzzle.run()
+def main():
+    puzzle = Day24()
+    puzzle.run()
+
+
+if __name__ == '__main__':
+    main()
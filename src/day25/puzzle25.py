@@ -15,5 +15,10 @@ class Day25(Puzzle):
         return 0
 
 
-puzzle = Day25()
-puzzle.run()
+def main():
+    puzzle = Day25()
+    puzzle.run()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+#! /usr/bin/env python3
+
+"""Run every day's puzzle in one process pool and print a combined report"""
+
+import argparse
+import importlib
+import io
+import os
+import sys
+import time
+import traceback
+
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+from dataclasses import dataclass
+from types import ModuleType
+
+from common import Options, Puzzle
+
+DAYS = list(range(1, 26))
+
+
+@dataclass
+class Outcome:
+    """The captured output and timing of one day's run"""
+
+    day: int
+    name: str
+    output: str
+    elapsed: float
+    error: str = None
+
+    @property
+    def status(self) -> str:
+        return 'failed' if self.error else 'ok'
+
+
+def load(day: int) -> ModuleType:
+    """Import the module for one day"""
+    return importlib.import_module(f'day{day:02}.puzzle{day:02}')
+
+
+def puzzle_class(module: ModuleType) -> type[Puzzle]:
+    """Find the Puzzle subclass defined in a day's module"""
+    for value in vars(module).values():
+        if isinstance(value, type) and issubclass(value, Puzzle) and value.__module__ == module.__name__:
+            return value
+    raise LookupError(f'No Puzzle in {module.__name__}')
+
+
+def solve(day: int) -> Outcome:
+    """Run one day's puzzle, capturing everything it prints"""
+    module = load(day)
+    name = puzzle_class(module).__name__
+
+    buffer = io.StringIO()
+    error = None
+
+    started = time.perf_counter_ns()
+    with redirect_stdout(buffer):
+        try:
+            module.main()
+        except Exception:
+            error = traceback.format_exc()
+    elapsed = (time.perf_counter_ns() - started) / 1_000_000
+
+    return Outcome(day, name, buffer.getvalue(), elapsed, error)
+
+
+def report(outcomes: list[Outcome], wall: float) -> None:
+    """Print a summary of per-day timings"""
+    print('===== Summary =====')
+    for outcome in outcomes:
+        print(f'{outcome.elapsed:12,.3f} ms: {outcome.name} {outcome.status}')
+    print(f'{sum(o.elapsed for o in outcomes):12,.3f} ms: total of all days')
+    print(f'{wall:12,.3f} ms: wall clock')
+
+
+def main(argv: list[str] = None) -> int:
+    # Every puzzle reads the same options from sys.argv, so declare them here too, to keep their values out of DAYS
+    parser = argparse.ArgumentParser(description=__doc__, parents=[Options.parser()])
+    parser.add_argument('days', metavar='DAY', type=int, nargs='*', default=DAYS, help='days to run (default: all)')
+    parser.add_argument('--jobs', '-j', type=int, default=os.cpu_count(), help='worker processes (default: one per CPU)')
+    args = parser.parse_args(argv)
+
+    # Import everything up front, so forked workers inherit the loaded modules
+    for day in args.days:
+        puzzle_class(load(day))
+
+    outcomes = []
+    started = time.perf_counter_ns()
+    with ProcessPoolExecutor(max_workers=args.jobs) as executor:
+        for outcome in executor.map(solve, args.days):
+            print(f'===== Day {outcome.day:02} =====')
+            print(outcome.output, end='')
+            if outcome.error:
+                print(outcome.error, end='')
+            outcomes.append(outcome)
+    wall = (time.perf_counter_ns() - started) / 1_000_000
+
+    report(outcomes, wall)
+
+    return 1 if any(o.error for o in outcomes) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
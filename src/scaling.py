@@ -0,0 +1,144 @@
+#! /usr/bin/env python3
+
+"""Measure how each day's solver scales on generated data files of increasing size"""
+
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+
+from concurrent.futures import ProcessPoolExecutor
+
+from common import Options, StreamingPuzzle, max_rss
+from run_all import load, puzzle_class
+
+DAYS = list(range(1, 15))
+SCALES = [1, 10, 100, 1000]
+PHASES = ['parse', 'part1', 'part2']
+
+
+def generate(day: int, scale: int, seed: int, directory: str) -> str:
+    """Write a generated data file for one day, unless it already exists"""
+    filename = os.path.join(directory, f'day{day:02}-x{scale}-s{seed}.data')
+    if not os.path.exists(filename):
+        puzzle = puzzle_class(load(day))()
+        with open(f'{filename}.tmp', 'w') as out:
+            puzzle.generate(out, scale, random.Random(seed * 10_000 + scale))
+        os.replace(f'{filename}.tmp', filename)
+    return filename
+
+
+def measure(day: int, filename: str) -> dict:
+    """Parse and solve one data file, timing each phase and measuring peak memory
+
+    This runs in a fresh process each time, so that the peak RSS belongs to this file alone.
+    """
+    puzzle = puzzle_class(load(day))()
+    puzzle.measuring = True
+    result = {'bytes': os.path.getsize(filename), 'ms': {}, 'rss': {}, 'streaming': isinstance(puzzle, StreamingPuzzle)}
+
+    baseline = max_rss()
+    data = None
+    for phase in PHASES:
+        rss = max_rss()
+        started = time.perf_counter_ns()
+        if phase == 'parse':
+            data = puzzle.parse_data(filename)
+        else:
+            getattr(puzzle, phase)(puzzle.generated(data))
+        result['ms'][phase] = (time.perf_counter_ns() - started) / 1_000_000
+        result['rss'][phase] = max_rss() - rss
+
+    result['peak'] = max_rss() - baseline
+    return result
+
+
+def exponent(sizes: list[float], values: list[float]) -> float:
+    """Fit values = c * sizes ** k by least squares on a log-log scale, returning k"""
+    points = [(math.log(s), math.log(v)) for s, v in zip(sizes, values) if s > 0 and v > 0]
+    if len(points) < 2:
+        return math.nan
+
+    mean_x = sum(x for x, _ in points) / len(points)
+    mean_y = sum(y for _, y in points) / len(points)
+    spread = sum((x - mean_x) ** 2 for x, _ in points)
+    if spread == 0:
+        return math.nan
+    return sum((x - mean_x) * (y - mean_y) for x, y in points) / spread
+
+
+def scale_day(day: int, args: argparse.Namespace) -> dict:
+    """Run one day at increasing scales, stopping when the next run would take too long
+
+    The next run's time is predicted from the exponent fitted so far,
+    or assumed to be quadratic until there are two runs to fit.
+    """
+    runs = {}
+    for scale in args.scales:
+        filename = generate(day, scale, args.seed, args.workdir)
+
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            run = executor.submit(measure, day, filename).result()
+        runs[scale] = run
+
+        total = sum(run['ms'].values())
+        print(f'{total:12,.3f} ms: day {day:02} at {scale:5}x, {run["bytes"]:,} bytes, '
+              + ', '.join(f'{phase} {run["ms"][phase]:,.3f} ms' for phase in PHASES)
+              + f', peak RSS +{run["peak"] / 1024:,.0f} KB')
+
+        fitted = exponent(list(runs), [sum(r['ms'].values()) for r in runs.values()])
+        growth = 2.0 if math.isnan(fitted) else max(1.0, fitted)
+
+        following = [s for s in args.scales if s > scale]
+        if following and total * (following[0] / scale) ** growth > args.budget * 1000:
+            print(f'               day {day:02} skipping {", ".join(f"{s}x" for s in following)}: '
+                  f'over the {args.budget} s budget')
+            break
+
+    # Fit against the scale, since a file's size doesn't always track the work in it (day 11)
+    scales = list(runs)
+    fits = {phase: exponent(scales, [runs[s]['ms'][phase] for s in scales]) for phase in PHASES}
+    if runs[scales[0]]['streaming']:
+        # A streaming puzzle's parse only makes a Stream, and each part reads and parses the file as it folds
+        fits['parse'] = math.nan
+    fits['memory'] = exponent(scales, [runs[s]['peak'] for s in scales])
+
+    print(f'               day {day:02} exponents: '
+          + ', '.join(f'{name} {value:.2f}' for name, value in fits.items()))
+
+    return {'runs': runs, 'exponents': fits}
+
+
+def main(argv: list[str] = None) -> int:
+    # Every puzzle reads the same options from sys.argv, so declare them here too
+    parser = argparse.ArgumentParser(description=__doc__, parents=[Options.parser()])
+    parser.add_argument('days', metavar='DAY', type=int, nargs='*', default=DAYS, help='days to run (default: 1-14)')
+    parser.add_argument('--scales', type=int, nargs='+', default=SCALES, help='multiples of the real data size')
+    parser.add_argument('--budget', type=float, default=60, help='seconds a single run is predicted to take, at most')
+    parser.add_argument('--seed', type=int, default=2022, help='random seed for the generators')
+    parser.add_argument('--workdir', default=os.path.join(tempfile.gettempdir(), 'aoc2022-scaling'),
+                        help='where to keep generated data files')
+    parser.add_argument('--output', help='write the measurements to this JSON file')
+    args = parser.parse_args(argv)
+    args.scales.sort()
+
+    os.makedirs(args.workdir, exist_ok=True)
+
+    results = {}
+    for day in args.days:
+        results[day] = scale_day(day, args)
+
+    if args.output:
+        with open(args.output, 'w') as jf:
+            json.dump({'seed': args.seed, 'scales': args.scales, 'days': results}, jf, indent=2)
+        print(f'Saved measurements to {args.output}')
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())